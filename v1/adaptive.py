@@ -0,0 +1,65 @@
+import math
+
+import numpy as np
+
+from landmarks import NUM_LANDMARKS, iter_pose_frames
+
+
+class AdaptiveScheduler:
+    def __init__(self, target_fps=30, max_interval=4, smoothing=0.1):
+        self.budget = 1.0 / target_fps
+        self.max_interval = max_interval
+        self.smoothing = smoothing
+        self.latency = None
+        self.interval = 1
+        self.skipped = 0
+        self.previous = np.full((NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+        self.previous_timestamp = 0.0
+
+    def should_infer(self):
+        if self.skipped + 1 >= self.interval:
+            return True
+        self.skipped += 1
+        return False
+
+    def record(self, latency):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+        self.interval = min(
+            self.max_interval, max(1, math.ceil(self.latency / self.budget))
+        )
+
+    def interpolate(self, pose_frame):
+        skipped, self.skipped = self.skipped, 0
+        frames = ()
+        if skipped and pose_frame.detected and not np.isnan(self.previous[0, 0]):
+            weights = np.arange(1, skipped + 1, dtype=np.float32) / (skipped + 1)
+            weights = weights[:, None, None]
+            points = (1 - weights) * self.previous + weights * pose_frame.points
+            timestamps = self.previous_timestamp + np.ravel(weights) * (
+                pose_frame.timestamp - self.previous_timestamp
+            )
+            frames = iter_pose_frames(points, timestamps)
+
+        if pose_frame.detected:
+            self.previous[:] = pose_frame.points
+            self.previous_timestamp = pose_frame.timestamp
+        else:
+            self.previous[:] = np.nan
+        return frames
+
+
+def add_scheduler_arguments(parser):
+    parser.add_argument(
+        "--target-fps",
+        type=float,
+        help="skip pose inference on some frames to hold this frame rate",
+    )
+
+
+def scheduler_from_args(args):
+    if not args.target_fps:
+        return None
+    return AdaptiveScheduler(args.target_fps)
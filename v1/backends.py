@@ -0,0 +1,185 @@
+import os
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from landmarks import NUM_LANDMARKS
+
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+
+# What every backend's process() returns. pose_landmarks is either MediaPipe's
+# landmark list or a (33, 4) array of x, y, z and visibility.
+PoseResult = namedtuple("PoseResult", "pose_landmarks")
+
+
+def default_model(backend, profile):
+    names = {
+        "tasks": f"pose_landmarker_{profile}.task",
+        "onnx": f"pose_landmark_{profile}.onnx",
+    }
+    return os.path.join(MODELS_DIR, names[backend])
+
+
+def process_batch(pose, images):
+    batch = getattr(pose, "process_batch", None)
+    if batch is None:
+        return [pose.process(image) for image in images]
+    return batch(images)
+
+
+class TasksPose:
+    # MediaPipe Tasks PoseLandmarker in video mode, which tracks the person
+    # between frames like the legacy solution does.
+    frame_ms = 33
+
+    def __init__(self, model_path, min_confidence=0.5):
+        # MediaPipe takes seconds to import, so it is only loaded with the model.
+        import mediapipe as mp
+
+        self._mp = mp
+        self.options = mp.tasks.vision.PoseLandmarkerOptions(
+            base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
+            running_mode=mp.tasks.vision.RunningMode.VIDEO,
+            min_pose_detection_confidence=min_confidence,
+            min_pose_presence_confidence=min_confidence,
+            min_tracking_confidence=min_confidence,
+        )
+        self.landmarker = mp.tasks.vision.PoseLandmarker.create_from_options(
+            self.options
+        )
+        self.timestamp_ms = 0
+
+    def process(self, image):
+        # Video mode only needs increasing timestamps. A fixed step keeps
+        # tracking independent of how fast frames are decoded.
+        self.timestamp_ms += self.frame_ms
+        result = self.landmarker.detect_for_video(
+            self._mp.Image(image_format=self._mp.ImageFormat.SRGB, data=image),
+            self.timestamp_ms,
+        )
+        if not result.pose_landmarks:
+            return PoseResult(None)
+        return PoseResult(
+            np.array(
+                [
+                    (landmark.x, landmark.y, landmark.z, landmark.visibility)
+                    for landmark in result.pose_landmarks[0]
+                ],
+                dtype=np.float32,
+            )
+        )
+
+    def reset(self):
+        self.landmarker.close()
+        self.landmarker = self._mp.tasks.vision.PoseLandmarker.create_from_options(
+            self.options
+        )
+        self.timestamp_ms = 0
+
+    def close(self):
+        self.landmarker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class OnnxPose:
+    # The BlazePose landmark model exported to ONNX: NHWC RGB input in [0, 1],
+    # one output of 39 landmarks x (x, y, z, visibility, presence) in input
+    # pixels, and one pose presence output (see "Pose Models" in the README).
+    # All scores are handled as probabilities. Visibility and presence come out
+    # as logits, since MediaPipe applies their sigmoid after the model, while
+    # the pose presence output already went through one inside it. The model
+    # has no person detector, so it expects the person to fill most of the
+    # frame (see --roi). It keeps no state between frames, which lets whole
+    # batches run at once.
+    def __init__(self, model_path, threads=None, min_confidence=0.5):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        self.session = ort.InferenceSession(
+            model_path, options, providers=["CPUExecutionProvider"]
+        )
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.size = model_input.shape[1]
+        # Models exported with a fixed batch size run one frame at a time.
+        self.batched = not isinstance(model_input.shape[0], int)
+        self.min_confidence = min_confidence
+        self._input = None
+        self._padded = np.empty((self.size, self.size, 3), dtype=np.uint8)
+
+    def _letterbox(self, image, out):
+        height, width = image.shape[:2]
+        scale = self.size / max(height, width)
+        resized_width, resized_height = round(width * scale), round(height * scale)
+        left = (self.size - resized_width) // 2
+        top = (self.size - resized_height) // 2
+        out.fill(0)
+        out[top : top + resized_height, left : left + resized_width] = cv2.resize(
+            image, (resized_width, resized_height), interpolation=cv2.INTER_AREA
+        )
+        return left, top, resized_width, resized_height
+
+    def _run(self, images):
+        count = len(images)
+        if self._input is None or len(self._input) < count:
+            self._input = np.empty((count, self.size, self.size, 3), dtype=np.float32)
+        boxes = []
+        for image, out in zip(images, self._input):
+            boxes.append(self._letterbox(image, self._padded))
+            np.multiply(self._padded, 1 / 255, out=out)
+
+        outputs = self.session.run(None, {self.input_name: self._input[:count]})
+        landmarks = scores = None
+        for output in outputs:
+            per_frame = output.size // count
+            if per_frame % 5 == 0 and per_frame // 5 >= NUM_LANDMARKS:
+                landmarks = output.reshape(count, -1, 5)[:, :NUM_LANDMARKS]
+            elif per_frame == 1:
+                scores = output.reshape(count)
+
+        visibilities = 1 / (1 + np.exp(-landmarks[..., 3]))
+        results = []
+        for points, visibility, score, (left, top, width, height) in zip(
+            landmarks, visibilities, scores, boxes
+        ):
+            if score < self.min_confidence:
+                results.append(PoseResult(None))
+                continue
+            array = np.empty((NUM_LANDMARKS, 4), dtype=np.float32)
+            array[:, 0] = (points[:, 0] - left) / width
+            array[:, 1] = (points[:, 1] - top) / height
+            array[:, 2] = points[:, 2] / width
+            array[:, 3] = visibility
+            results.append(PoseResult(array))
+        return results
+
+    def process(self, image):
+        return self._run([image])[0]
+
+    def process_batch(self, images):
+        if self.batched:
+            return self._run(images)
+        return [result for image in images for result in self._run([image])]
+
+    def reset(self):
+        pass
+
+    def close(self):
+        self.session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
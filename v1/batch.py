@@ -0,0 +1,321 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+from backends import default_model
+from counters import COUNTERS
+from engine import (
+    add_pose_arguments,
+    pose_from_args,
+    run_batched,
+    run_exercise,
+    video_clock,
+)
+from landmark_cache import LandmarkCache, file_digest
+from motion import add_gate_arguments, gate_from_args
+from pipeline import StageStats
+from reps import RepEvents, RepMetrics
+from roi import add_region_arguments, region_from_args
+from traces import TraceRecorder, replay
+
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+RESULT_FIELDS = (
+    "path",
+    "exercise",
+    "count",
+    "cadence",
+    "rep_seconds",
+    "rep_range",
+    "frames",
+    "seconds",
+    "fps",
+    "cached",
+    "saved_seconds",
+    "error",
+)
+
+_args = None
+_pose = None
+_cache = None
+
+
+def find_videos(patterns):
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                paths.extend(
+                    os.path.join(root, name)
+                    for name in files
+                    if name.lower().endswith(VIDEO_EXTENSIONS)
+                )
+        elif os.path.isfile(pattern):
+            paths.append(pattern)
+        else:
+            paths.extend(glob.glob(pattern, recursive=True))
+    return sorted(set(paths))
+
+
+def _init_worker(args):
+    global _args, _cache
+    _args = args
+    if args.cache:
+        _cache = LandmarkCache(args.cache, args.cache_size << 20)
+
+
+def _model():
+    # Loaded on the first cache miss, so fully cached runs never load it.
+    global _pose
+    if _pose is None:
+        _pose = pose_from_args(_args)
+    return _pose
+
+
+def cache_settings(args):
+    # Everything that changes which landmarks a video produces.
+    settings = {
+        "backend": args.backend,
+        "profile": args.profile,
+        "smooth_landmarks": args.smooth_landmarks,
+        "inference_width": args.inference_width,
+        "roi": args.roi,
+        "motion_gate": args.motion_gate,
+    }
+    if args.backend != "mediapipe":
+        settings["model"] = file_digest(
+            args.model or default_model(args.backend, args.profile)
+        )
+    return settings
+
+
+def rep_fields(events, metrics):
+    # Waits for the metrics subscriber to see every rep of the video.
+    events.close()
+    summary = metrics.summary()
+    if not summary["reps"]:
+        return {}
+    return {
+        "cadence": summary["cadence"],
+        "rep_seconds": summary["duration_mean"],
+        "rep_range": summary["range_mean"],
+    }
+
+
+def score_video(path, exercise, region=None, batch_size=1, settings=None):
+    result = dict.fromkeys(RESULT_FIELDS)
+    result.update(path=path, exercise=exercise, count=0, frames=0, cached=False)
+    started = time.perf_counter()
+    events = RepEvents()
+    metrics = RepMetrics()
+    events.subscribe(metrics.update)
+    counter = COUNTERS[exercise](events)
+
+    key = None
+    if _cache is not None and os.path.isfile(path):
+        key = _cache.key(path, settings)
+        entry = _cache.load(key)
+        if entry is not None:
+            points, timestamps, info = entry
+            count = replay(points, counter, timestamps=timestamps)
+            seconds = time.perf_counter() - started
+            # With the motion gate on, skipped frames have no landmarks, so the
+            # entry keeps the video's frame count next to its rows.
+            frames = info.get("video_frames", len(points))
+            result.update(
+                count=count,
+                frames=frames,
+                seconds=round(seconds, 3),
+                fps=round(frames / seconds, 1) if seconds else 0.0,
+                cached=True,
+                saved_seconds=round(max(0.0, info["seconds"] - seconds), 3),
+                **rep_fields(events, metrics),
+            )
+            return result
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        result["error"] = "could not open video"
+        events.close()
+        return result
+
+    pose = _model()
+    pose.reset()
+    stats = StageStats("inference")
+    recorder = TraceRecorder() if key is not None else None
+    inferred_at = time.perf_counter()
+    try:
+        if batch_size > 1:
+            result["count"] = run_batched(
+                cap,
+                counter,
+                pose,
+                batch_size,
+                stats=stats,
+                recorder=recorder,
+                clock=video_clock(cap),
+            )
+        else:
+            result["count"] = run_exercise(
+                cap,
+                counter,
+                target=None,
+                show=False,
+                pose=pose,
+                stats=stats,
+                recorder=recorder,
+                region=region,
+                clock=video_clock(cap),
+                gate=gate_from_args(_args),
+            )
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        cap.release()
+    seconds = time.perf_counter() - started
+
+    if recorder is not None and result["error"] is None:
+        _cache.store(
+            key,
+            recorder.points[: recorder.frames],
+            recorder.timestamps[: recorder.frames],
+            seconds=time.perf_counter() - inferred_at,
+            video_frames=stats.frames,
+        )
+    result.update(
+        frames=stats.frames,
+        seconds=round(seconds, 3),
+        fps=round(stats.frames / seconds, 1) if seconds else 0.0,
+        **rep_fields(events, metrics),
+    )
+    return result
+
+
+def write_results(results, output):
+    if output.lower().endswith(".csv"):
+        with open(output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Count reps in recorded workout videos without opening any windows."
+    )
+    parser.add_argument("exercise", choices=sorted(COUNTERS))
+    parser.add_argument(
+        "videos", nargs="+", help="video files, directories or glob patterns"
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="results.json",
+        help="where to write per-file results (.json or .csv)",
+    )
+    parser.add_argument(
+        "-j", "--workers", type=int, default=os.cpu_count(), help="worker processes"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="frames per model call; needs a backend without tracking (onnx)",
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="DIR",
+        help="keep every video's landmarks in DIR and reuse them on later runs",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=2048,
+        metavar="MB",
+        help="delete the least recently used cache entries above this size",
+    )
+    add_pose_arguments(parser)
+    add_region_arguments(parser)
+    add_gate_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.batch_size > 1 and args.backend != "onnx":
+        parser.error("--batch-size needs --backend onnx")
+    if args.batch_size > 1 and args.roi:
+        parser.error("--roi follows the previous frame and cannot be batched")
+    if args.batch_size > 1 and args.motion_gate:
+        parser.error("--motion-gate decides frame by frame and cannot be batched")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = find_videos(args.videos)
+    if not paths:
+        print("No videos found.")
+        return
+
+    workers = min(args.workers, len(paths))
+    if args.threads is None:
+        # Split the cores between worker processes instead of oversubscribing.
+        args.threads = max(1, os.cpu_count() // workers)
+
+    cache = settings = None
+    if args.cache:
+        cache = LandmarkCache(args.cache, args.cache_size << 20)
+        cache.evict()
+        settings = cache_settings(args)
+
+    results = []
+    started = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(args,)
+    ) as executor:
+        futures = [
+            executor.submit(
+                score_video,
+                path,
+                args.exercise,
+                region_from_args(args),
+                args.batch_size,
+                settings,
+            )
+            for path in paths
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            status = result["error"] or f"{result['count']} reps, {result['fps']} fps"
+            if result["cached"]:
+                status += " (cached)"
+            print(f"[{len(results)}/{len(paths)}] {result['path']}: {status}")
+    seconds = time.perf_counter() - started
+
+    results.sort(key=lambda result: result["path"])
+    write_results(results, args.output)
+
+    frames = sum(result["frames"] for result in results)
+    print(
+        f"Scored {len(results)} videos ({frames} frames) in {seconds:.1f}s, "
+        f"{frames / seconds:.1f} frames/sec. Results written to {args.output}"
+    )
+    if cache is not None:
+        hits = [result for result in results if result["cached"]]
+        saved = sum(result["saved_seconds"] for result in hits)
+        print(
+            f"Landmark cache: {len(hits)}/{len(results)} hits "
+            f"({len(hits) / len(results):.0%}), {saved:.1f}s of inference saved, "
+            f"{cache.size() / 2**20:.1f} MB in {args.cache}"
+        )
+
+
+if __name__ == "__main__":
+    main()
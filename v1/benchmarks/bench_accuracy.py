@@ -0,0 +1,74 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from counters import COUNTERS  # noqa: E402
+from synthetic import rep_sequence  # noqa: E402
+from traces import load_trace, replay  # noqa: E402
+
+
+SOURCE_FPS = 30
+
+
+def add_glitches(points, rate, scale, seed=0):
+    # Single-frame landmark jumps, like the ones MediaPipe produces under occlusion.
+    rng = np.random.default_rng(seed)
+    glitched = rng.random(len(points)) < rate
+    points[glitched, :, :2] += rng.normal(0.0, scale, points[glitched, :, :2].shape)
+    return points
+
+
+def decimated_counts(exercise, points, timestamps, steps):
+    return [
+        replay(points[::step], COUNTERS[exercise](), timestamps=timestamps[::step])
+        for step in steps
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Check rep counts when landmarks arrive at lower frame rates."
+    )
+    parser.add_argument("--reps", type=int, default=20)
+    parser.add_argument("--noise", type=float, default=0.01)
+    parser.add_argument("--glitch-rate", type=float, default=0.03)
+    parser.add_argument("--steps", type=int, nargs="+", default=[1, 2, 3, 6])
+    parser.add_argument(
+        "--trace",
+        action="append",
+        default=[],
+        metavar="PATH=REPS",
+        help="recorded trace and its true rep count, e.g. squats.npz=12",
+    )
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'':>32}"
+        + "".join(f"{SOURCE_FPS / step:>8.0f}fps" for step in args.steps)
+    )
+    for exercise in COUNTERS:
+        points = rep_sequence(exercise, reps=args.reps, noise=args.noise)
+        add_glitches(points, args.glitch_rate, 5 * args.noise)
+        timestamps = np.arange(len(points)) / SOURCE_FPS
+        counts = decimated_counts(exercise, points, timestamps, args.steps)
+        print(
+            f"{exercise:>24} ({args.reps:>3})"
+            + "".join(f"{count:>11}" for count in counts)
+        )
+
+    for spec in args.trace:
+        path, _, expected = spec.partition("=")
+        points, timestamps, exercise = load_trace(path)
+        counts = decimated_counts(exercise, points, timestamps, args.steps)
+        print(
+            f"{os.path.basename(path):>24} ({expected or '?':>3})"
+            + "".join(f"{count:>11}" for count in counts)
+        )
+
+
+if __name__ == "__main__":
+    main()
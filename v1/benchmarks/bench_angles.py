@@ -0,0 +1,105 @@
+import argparse
+import enum
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from landmarks import (  # noqa: E402
+    DISTANCES,
+    JOINT_ANGLES,
+    NUM_LANDMARKS,
+    POSE_LANDMARKS,
+    PoseFrame,
+    calculate_angle,
+    joint_angles,
+    landmark_distances,
+)
+
+
+# Stand-in for mp_pose.PoseLandmark so the per-call path pays the same enum lookups.
+PoseLandmark = enum.IntEnum("PoseLandmark", POSE_LANDMARKS, start=0)
+
+
+def make_pose_landmarks(rng):
+    return SimpleNamespace(
+        landmark=[
+            SimpleNamespace(x=x, y=y, z=z, visibility=v)
+            for x, y, z, v in rng.random((NUM_LANDMARKS, 4)).tolist()
+        ]
+    )
+
+
+def _point(landmarks, name):
+    return [
+        landmarks[PoseLandmark[name].value].x,
+        landmarks[PoseLandmark[name].value].y,
+    ]
+
+
+def per_call_features(pose_landmarks):
+    landmarks = pose_landmarks.landmark
+    angles = [
+        calculate_angle(
+            _point(landmarks, first), _point(landmarks, vertex), _point(landmarks, last)
+        )
+        for _, first, vertex, last in JOINT_ANGLES
+    ]
+    distances = [
+        np.linalg.norm(np.array(_point(landmarks, a)) - np.array(_point(landmarks, b)))
+        for _, a, b in DISTANCES
+    ]
+    return angles, distances
+
+
+def time_per_frame(func, frames, number, repeat):
+    best = min(timeit.repeat(func, number=number, repeat=repeat))
+    return best / (number * frames) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare per-call calculate_angle with the batched landmark kernel."
+    )
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    pose_landmarks = make_pose_landmarks(rng)
+    pose_frame = PoseFrame()
+    batch = rng.random((args.batch, NUM_LANDMARKS, 4)).astype(np.float32)
+
+    pose_frame.update(pose_landmarks)
+    angles, distances = per_call_features(pose_landmarks)
+    assert np.allclose(pose_frame.angles, angles, atol=1e-2)
+    assert np.allclose(pose_frame.distances, distances, atol=1e-5)
+
+    results = {
+        "calculate_angle": time_per_frame(
+            lambda: per_call_features(pose_landmarks), 1, args.frames, args.repeat
+        ),
+        "PoseFrame.update": time_per_frame(
+            lambda: pose_frame.update(pose_landmarks), 1, args.frames, args.repeat
+        ),
+        "kernel": time_per_frame(pose_frame.compute, 1, args.frames, args.repeat),
+        f"kernel x{args.batch}": time_per_frame(
+            lambda: (joint_angles(batch), landmark_distances(batch)),
+            args.batch,
+            max(1, args.frames // args.batch),
+            args.repeat,
+        ),
+    }
+
+    baseline = results["calculate_angle"]
+    for name, per_frame in results.items():
+        print(f"{name:>18}: {per_frame:8.2f} us/frame  {baseline / per_frame:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
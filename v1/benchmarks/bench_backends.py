@@ -0,0 +1,113 @@
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import process_batch  # noqa: E402
+from engine import POSE_BACKENDS, POSE_PROFILES, open_backend  # noqa: E402
+
+
+def read_frames(path, limit):
+    # Frames are decoded up front so only the model is timed.
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    cap.release()
+    return frames
+
+
+def configurations(backends, threads):
+    for spec in backends:
+        backend, _, model = spec.partition("=")
+        if backend not in POSE_BACKENDS:
+            raise SystemExit(f"unknown backend {backend!r}")
+        if backend == "onnx":
+            for count in threads:
+                yield f"onnx {count} threads", backend, model or None, count
+        else:
+            yield backend, backend, model or None, None
+
+
+def latency(pose, frames, warm_up=5):
+    for frame in frames[:warm_up]:
+        pose.process(frame)
+    times = []
+    detected = 0
+    for frame in frames:
+        started = time.perf_counter()
+        result = pose.process(frame)
+        times.append(time.perf_counter() - started)
+        detected += result.pose_landmarks is not None
+    return np.array(times), detected / len(frames)
+
+
+def throughput(pose, frames, batch_size):
+    started = time.perf_counter()
+    for start in range(0, len(frames), batch_size):
+        process_batch(pose, frames[start : start + batch_size])
+    return len(frames) / (time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare per-frame latency and batched throughput of the pose "
+        "backends on one clip."
+    )
+    parser.add_argument("video", help="clip to run every backend on")
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=["mediapipe"],
+        metavar="BACKEND[=MODEL]",
+        help=f"backends to compare, out of {', '.join(POSE_BACKENDS)}",
+    )
+    parser.add_argument("--profile", choices=POSE_PROFILES, default="full")
+    parser.add_argument(
+        "--threads",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, os.cpu_count()],
+        help="intra-op thread counts to try with onnx",
+    )
+    parser.add_argument(
+        "--batch-sizes",
+        type=int,
+        nargs="+",
+        default=[1, 8, 32],
+        help="batch sizes for the throughput run",
+    )
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args(argv)
+
+    frames = read_frames(args.video, args.frames)
+    if not frames:
+        raise SystemExit(f"no frames read from {args.video}")
+    print(f"{len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+    for name, backend, model, threads in configurations(
+        args.backends, sorted(set(args.threads))
+    ):
+        with open_backend(backend, args.profile, model=model, threads=threads) as pose:
+            times, detected = latency(pose, frames)
+            p50, p95 = np.percentile(times, (50, 95)) * 1000
+            rates = [
+                f"batch {size}: {throughput(pose, frames, size):7.1f} fps"
+                for size in args.batch_sizes
+            ]
+        print(
+            f"{name:>16}: p50 {p50:6.2f} ms  p95 {p95:6.2f} ms  "
+            f"detected {detected:4.0%}  {'  '.join(rates)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
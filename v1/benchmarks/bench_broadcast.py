@@ -0,0 +1,170 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from broadcast import HEADER, KEY, FrameDecoder, LandmarkPublisher  # noqa: E402
+from synthetic import rep_sequence  # noqa: E402
+
+
+async def _client(port, slow_delay, ack_every, results):
+    from websockets.asyncio.client import connect
+    from websockets.exceptions import ConnectionClosed
+
+    decoder = FrameDecoder()
+    stats = {"frames": 0, "bytes": 0, "keys": 0, "errors": 0, "slow": bool(slow_delay)}
+    latencies = []
+    acked = 0
+    async with connect(f"ws://127.0.0.1:{port}", compression=None) as websocket:
+        results.put("connected")
+        try:
+            async for message in websocket:
+                received = time.perf_counter()
+                if isinstance(message, str):
+                    continue
+                try:
+                    seq, sent, _, _ = decoder.decode(message)
+                except ValueError:
+                    stats["errors"] += 1
+                    continue
+                # perf_counter is the system-wide monotonic clock on Linux, so the
+                # publisher's timestamps compare directly with the client's.
+                latencies.append(received - sent)
+                stats["frames"] += 1
+                stats["bytes"] += len(message)
+                stats["keys"] += message[0] == KEY
+                if slow_delay:
+                    await asyncio.sleep(slow_delay)
+                if ack_every and seq - acked >= ack_every:
+                    await websocket.send(str(seq))
+                    acked = seq
+        except ConnectionClosed:
+            pass
+    stats["latencies"] = latencies
+    return stats
+
+
+def run_clients(port, clients, slow, slow_delay, ack_every, results):
+    async def run():
+        return await asyncio.gather(
+            *(
+                _client(port, slow_delay if index < slow else 0.0, ack_every, results)
+                for index in range(clients)
+            )
+        )
+
+    results.put(asyncio.run(run()))
+
+
+def measure(points, clients, slow, slow_delay, ack_every, seconds, fps):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    with LandmarkPublisher(port=0) as publisher:
+        process = context.Process(
+            target=run_clients,
+            args=(publisher.port, clients, slow, slow_delay, ack_every, results),
+        )
+        process.start()
+        for _ in range(clients):
+            results.get()
+
+        publishing = 0.0
+        frames = int(seconds * fps)
+        started = time.perf_counter()
+        for index in range(frames):
+            # Paced like a camera, with the publish time as the frame timestamp.
+            time.sleep(max(0.0, started + index / fps - time.perf_counter()))
+            published_at = time.perf_counter()
+            publisher.publish(points[index % len(points)], index // 30, published_at)
+            publishing += time.perf_counter() - published_at
+        time.sleep(0.5)
+        dropped = sum(client.dropped for client in list(publisher.clients))
+    stats = results.get()
+    process.join()
+    return stats, frames, publishing / frames, dropped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure per-client bandwidth and fan-out latency of the "
+        "landmark broadcast with local WebSocket clients."
+    )
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 100, 200])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument(
+        "--slow", type=int, default=0, help="clients that read too slowly"
+    )
+    parser.add_argument(
+        "--slow-delay",
+        type=float,
+        default=0.1,
+        help="seconds a slow client spends on every frame",
+    )
+    parser.add_argument(
+        "--ack-every",
+        type=int,
+        default=5,
+        help="frames between a client's acknowledgements (0 for none)",
+    )
+    args = parser.parse_args(argv)
+
+    points = rep_sequence("squats", reps=20)
+    raw = HEADER.size + points[0].astype(np.float32).nbytes
+    print(f"Uncompressed float32 frame: {raw} bytes")
+    for clients in args.clients:
+        slow = min(args.slow, clients - 1)
+        stats, frames, publishing, dropped = measure(
+            points,
+            clients,
+            slow,
+            args.slow_delay,
+            args.ack_every,
+            args.seconds,
+            args.fps,
+        )
+        fast = [client for client in stats if not client["slow"]]
+        latencies = np.concatenate([client["latencies"] for client in fast]) * 1000
+        size = sum(client["bytes"] for client in fast) / sum(
+            client["frames"] for client in fast
+        )
+        bandwidth = np.mean([client["bytes"] for client in fast]) / args.seconds
+        received = np.mean([client["frames"] for client in fast]) / frames
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(
+            f"{clients:4d} clients: {size:5.1f} bytes/frame, "
+            f"{bandwidth / 1024:5.1f} KiB/s each, {received:.1%} frames received, "
+            f"latency p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms, "
+            f"max {latencies.max():.1f} ms, publish() {publishing * 1e6:.0f} us"
+        )
+        if slow:
+            behind = [client for client in stats if client["slow"]]
+            keys = sum(client["keys"] for client in behind)
+            got = sum(client["frames"] for client in behind)
+            errors = sum(client["errors"] for client in stats)
+            # Once its buffers are full a slow client's lag stops growing, so
+            # the second half of its frames shows where it levels off.
+            lag = np.median(
+                np.concatenate(
+                    [
+                        client["latencies"][len(client["latencies"]) // 2 :]
+                        for client in behind
+                    ]
+                )
+            )
+            print(
+                f"      {slow} slow clients: {got / slow / frames:.1%} frames "
+                f"received, {keys / got if got else 0:.0%} as key frames, "
+                f"latency p50 {lag * 1000:.0f} ms, {dropped} dropped, "
+                f"{errors} undecodable"
+            )
+
+
+if __name__ == "__main__":
+    main()
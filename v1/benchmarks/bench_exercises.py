@@ -0,0 +1,269 @@
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from counters import COUNTERS  # noqa: E402
+from filters import OneEuroFilter  # noqa: E402
+from landmarks import (  # noqa: E402
+    ANGLE_INDEX,
+    DISTANCE_INDEX,
+    LANDMARK_INDEX,
+    iter_pose_frames,
+)
+from synthetic import rep_sequence  # noqa: E402
+from traces import replay  # noqa: E402
+
+
+# The hand-written counters that exercises.json replaced, kept as the baseline.
+class Hysteresis:
+    # Switches on once every value is past `enter` and off only once every value
+    # is back past `exit`; enter < exit means "on" is the low side.
+    def __init__(self, enter, exit, active=False):
+        self.enter = enter
+        self.exit = exit
+        self.active = active
+
+    def __call__(self, values):
+        low, high = min(values), max(values)
+        if self.enter < self.exit:
+            if high < self.enter:
+                self.active = True
+            elif low > self.exit:
+                self.active = False
+        else:
+            if low > self.enter:
+                self.active = True
+            elif high < self.exit:
+                self.active = False
+        return self.active
+
+
+class Debounce:
+    # Accepts a new state only after it has held for `hold` seconds, counted
+    # from the last frame that still showed the old state.
+    def __init__(self, hold=0.1, state=None):
+        self.hold = hold
+        self.state = state
+        self.since = None
+        self.timestamp = None
+
+    def __call__(self, state, timestamp):
+        if state == self.state:
+            self.since = None
+        elif self.since is None:
+            self.since = timestamp if self.timestamp is None else self.timestamp
+        self.timestamp = timestamp
+        if self.since is not None and timestamp - self.since > self.hold:
+            self.state = state
+            self.since = None
+        return self.state
+
+
+class Phase:
+    # Filter -> hysteresis -> debounce for one rep signal, given as a list of
+    # floats. Calling it returns "enter" or "exit" on the frame the debounced
+    # state changes, else None.
+    def __init__(self, enter, exit, size=1, hold=0.1, min_cutoff=1.0, beta=0.0):
+        self.filter = OneEuroFilter([min_cutoff] * size, [beta] * size)
+        self.hysteresis = Hysteresis(enter, exit)
+        self.debounce = Debounce(hold)
+
+    def __call__(self, values, timestamp):
+        previous = self.debounce.state
+        active = self.hysteresis(self.filter(values, timestamp))
+        state = self.debounce(active, timestamp)
+        if previous is None or state == previous:
+            return None
+        return "enter" if state else "exit"
+
+
+LEFT_KNEE = ANGLE_INDEX["left_knee"]
+RIGHT_KNEE = ANGLE_INDEX["right_knee"]
+LEFT_ELBOW = ANGLE_INDEX["left_elbow"]
+RIGHT_ELBOW = ANGLE_INDEX["right_elbow"]
+HEAD = ANGLE_INDEX["head"]
+LEFT_HAND_RIGHT_FOOT = DISTANCE_INDEX["left_hand_right_foot"]
+RIGHT_HAND_LEFT_FOOT = DISTANCE_INDEX["right_hand_left_foot"]
+NOSE = LANDMARK_INDEX["NOSE"]
+WRISTS = [LANDMARK_INDEX["LEFT_WRIST"], LANDMARK_INDEX["RIGHT_WRIST"]]
+
+
+class SquatCounter:
+    key = "squats"
+    label = "Squats"
+    window_name = "Squat Detection"
+    drawing_colors = ()
+
+    def __init__(self):
+        self.count = 0
+        self.bent = Phase(enter=135, exit=160, size=2, min_cutoff=3.0, beta=0.02)
+
+    def update(self, frame):
+        knees = [frame.angles.item(LEFT_KNEE), frame.angles.item(RIGHT_KNEE)]
+        if self.bent(knees, frame.timestamp) == "enter":
+            self.count += 1
+            return 1
+        return 0
+
+
+class PushupCounter:
+    key = "pushups"
+    label = "Push-ups"
+    window_name = "Push-up Detection"
+    drawing_colors = ()
+
+    def __init__(self):
+        self.count = 0
+        self.bent = Phase(enter=90, exit=160, size=2, min_cutoff=3.0, beta=0.02)
+
+    def update(self, frame):
+        elbows = [frame.angles.item(LEFT_ELBOW), frame.angles.item(RIGHT_ELBOW)]
+        if self.bent(elbows, frame.timestamp) == "exit":
+            self.count += 1
+            return 1
+        return 0
+
+
+class HeadRotationCounter:
+    key = "head_rotation"
+    label = "Head Rotations"
+    window_name = "Head Rotation Detection"
+    drawing_colors = ()
+
+    def __init__(self, rotation_angle_threshold=80):
+        self.count = 0
+        self.rotation_angle_threshold = rotation_angle_threshold
+        self.turned = Phase(
+            enter=rotation_angle_threshold,
+            exit=rotation_angle_threshold + 10,
+            min_cutoff=3.0,
+            beta=0.02,
+        )
+
+    def update(self, frame):
+        if self.turned([frame.angles.item(HEAD)], frame.timestamp) == "exit":
+            self.count += 1
+            return 1
+        return 0
+
+
+class JumpingJackCounter:
+    key = "jumping jacks"
+    label = "Jumping Jacks"
+    window_name = "Jump Counter"
+    drawing_colors = ((245, 117, 66), (245, 66, 230))
+
+    def __init__(self):
+        self.count = 0
+        # Height of the wrists above the nose, in frame heights.
+        self.raised = Phase(enter=0.0, exit=-0.05, size=2, min_cutoff=3.0, beta=2.0)
+
+    def update(self, frame):
+        nose = frame.points.item(NOSE, 1)
+        wrists_above_head = [nose - frame.points.item(wrist, 1) for wrist in WRISTS]
+        if self.raised(wrists_above_head, frame.timestamp) == "enter":
+            self.count += 1
+            return 1
+        return 0
+
+
+class AlternateToeTouchCounter:
+    key = "alternate_toe_touches"
+    label = "Toe Touches"
+    window_name = "Toe Touch Detection"
+    drawing_colors = ()
+
+    def __init__(self, distance_threshold=0.1):
+        self.count = 0
+        self.stage = None
+        self.distance_threshold = distance_threshold
+        self.touches = {
+            side: Phase(
+                enter=distance_threshold,
+                exit=distance_threshold * 1.5,
+                min_cutoff=3.0,
+                beta=2.0,
+            )
+            for side in ("left_hand_right_foot", "right_hand_left_foot")
+        }
+
+    def update(self, frame):
+        added = 0
+        for side, index in (
+            ("left_hand_right_foot", LEFT_HAND_RIGHT_FOOT),
+            ("right_hand_left_foot", RIGHT_HAND_LEFT_FOOT),
+        ):
+            distance = [frame.distances.item(index)]
+            touched = self.touches[side](distance, frame.timestamp)
+            if touched == "enter" and self.stage != side:
+                self.stage = side
+                added += 1
+        self.count += added
+        return added
+
+
+HANDWRITTEN = {
+    counter.key: counter
+    for counter in (
+        SquatCounter,
+        PushupCounter,
+        HeadRotationCounter,
+        JumpingJackCounter,
+        AlternateToeTouchCounter,
+    )
+}
+
+
+def replay_all(points, counter_cls):
+    counter = counter_cls()
+    for pose_frame in iter_pose_frames(points):
+        counter.update(pose_frame)
+    return counter.count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare compiled exercise definitions with the hand-written counters."
+    )
+    parser.add_argument("--reps", type=int, default=50)
+    parser.add_argument("--noise", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'':>24}{'hand-written':>16}{'compiled':>16}{'replay':>16}"
+        f"{'features/frame':>18}{'features/trace':>18}  counts"
+    )
+    for exercise, compiled in COUNTERS.items():
+        points = rep_sequence(exercise, reps=args.reps, noise=args.noise)
+        frames = len(points)
+        program = compiled.program
+
+        def best(func):
+            seconds = min(timeit.repeat(func, number=1, repeat=args.repeat))
+            return seconds / frames * 1e6
+
+        handwritten_us = best(lambda: replay_all(points, HANDWRITTEN[exercise]))
+        compiled_us = best(lambda: replay_all(points, compiled))
+        replay_us = best(lambda: replay(points, compiled()))
+        per_frame_us = best(lambda: [program.features(frame) for frame in points])
+        per_trace_us = best(lambda: program.features(points))
+
+        counts = (
+            replay_all(points, HANDWRITTEN[exercise]),
+            replay_all(points, compiled),
+            replay(points, compiled()),
+        )
+        print(
+            f"{exercise:>24}{handwritten_us:>13.1f} us{compiled_us:>13.1f} us"
+            f"{replay_us:>13.1f} us{per_frame_us:>15.1f} us{per_trace_us:>15.2f} us  "
+            f"{' / '.join(map(str, counts))}"
+            f"{'' if len(set(counts)) == 1 else '  MISMATCH'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from buffers import FrameBuffers  # noqa: E402
+from engine import draw_pose, infer  # noqa: E402
+from landmarks import PoseFrame  # noqa: E402
+from synthetic import standing_pose  # noqa: E402
+
+
+class FixedPose:
+    # Stands in for the model so only frame handling is measured: every call
+    # returns the same landmarks, in the shape MediaPipe's results have.
+    def __init__(self):
+        self.results = SimpleNamespace(
+            pose_landmarks=SimpleNamespace(
+                landmark=[
+                    SimpleNamespace(x=x, y=y, z=z, visibility=visibility)
+                    for x, y, z, visibility in standing_pose().tolist()
+                ]
+            )
+        )
+
+    def process(self, image):
+        return self.results
+
+
+def write_video(path, frames, width, height):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (width, height))
+    gradient = np.linspace(0, 255, width).astype(np.int32)[None, :, None]
+    for index in range(frames):
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[:] = (gradient + index) % 256
+        writer.write(frame)
+    writer.release()
+
+
+def legacy_frame(cap, pose, pose_frame, frame):
+    # The original loop: a new capture array, an RGB copy for inference and
+    # a BGR copy of that for drawing, every frame.
+    ret, frame = cap.read()
+    if not ret:
+        return None
+    image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    image.flags.writeable = False
+    results = pose.process(image)
+    image.flags.writeable = True
+    image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+    pose_frame.update(results.pose_landmarks)
+    draw_pose(image, pose_frame.points)
+    return frame
+
+
+def current_frame(cap, pose, pose_frame, frame, buffers):
+    ret, frame = cap.read(frame)
+    if not ret:
+        return None
+    infer(pose, frame, pose_frame, buffers=buffers)
+    draw_pose(frame, pose_frame.points)
+    return frame
+
+
+def measure(path, step):
+    cap = cv2.VideoCapture(path)
+    pose = FixedPose()
+    pose_frame = PoseFrame()
+    frame = None
+    transient = []
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    while True:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        frame = step(cap, pose, pose_frame, frame)
+        if frame is None:
+            break
+        _, peak = tracemalloc.get_traced_memory()
+        transient.append(peak - baseline)
+    seconds = time.perf_counter() - started
+    tracemalloc.stop()
+    cap.release()
+
+    # The first frames allocate the reused buffers, so they are left out.
+    steady = np.array(transient[2:], dtype=np.float64)
+    return len(transient), seconds, steady
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure per-frame allocations of the capture, conversion and "
+        "drawing path, with pose inference replaced by fixed landmarks."
+    )
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "frames.avi")
+        write_video(path, args.frames, args.width, args.height)
+
+        frame_bytes = args.width * args.height * 3
+        buffers = FrameBuffers()
+        steps = [
+            ("copy per stage", legacy_frame),
+            (
+                "reused buffers",
+                lambda cap, pose, pose_frame, frame: current_frame(
+                    cap, pose, pose_frame, frame, buffers
+                ),
+            ),
+        ]
+        for name, step in steps:
+            frames, seconds, steady = measure(path, step)
+            print(
+                f"{name:>16}: {seconds / frames * 1e6:8.0f} us/frame  "
+                f"{steady.mean() / 1024:9.1f} KiB allocated/frame "
+                f"({steady.mean() / frame_bytes:.2f} frames)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import find_videos  # noqa: E402
+from counters import COUNTERS  # noqa: E402
+from engine import add_pose_arguments, pose_from_args, run_exercise  # noqa: E402
+from engine import video_clock  # noqa: E402
+from motion import MotionGate  # noqa: E402
+
+
+def score(path, exercise, pose, gate):
+    cap = cv2.VideoCapture(path)
+    pose.reset()
+    started = time.process_time()
+    count = run_exercise(
+        cap,
+        COUNTERS[exercise](),
+        target=None,
+        show=False,
+        pose=pose,
+        clock=video_clock(cap),
+        gate=gate,
+    )
+    cap.release()
+    return count, time.process_time() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure the CPU time the motion gate saves on recorded "
+        "sessions, and whether any reps are lost."
+    )
+    parser.add_argument("exercise", choices=sorted(COUNTERS))
+    parser.add_argument("videos", nargs="+", help="recorded sessions to score")
+    parser.add_argument("--width", type=int, default=96)
+    parser.add_argument("--min-motion", type=float, default=0.01)
+    parser.add_argument("--still-interval", type=float, default=0.25)
+    parser.add_argument("--idle-interval", type=float, default=1.0)
+    add_pose_arguments(parser)
+    args = parser.parse_args(argv)
+
+    totals = [0.0, 0.0, 0]
+    with pose_from_args(args) as pose:
+        for path in find_videos(args.videos):
+            count, cpu = score(path, args.exercise, pose, None)
+            gate = MotionGate(
+                args.width,
+                min_motion=args.min_motion,
+                still_interval=args.still_interval,
+                idle_interval=args.idle_interval,
+            )
+            gated_count, gated_cpu = score(path, args.exercise, pose, gate)
+            totals[0] += cpu
+            totals[1] += gated_cpu
+            totals[2] += abs(gated_count - count)
+            print(
+                f"{path}: {count} -> {gated_count} reps, "
+                f"cpu {cpu:.1f}s -> {gated_cpu:.1f}s, {gate.summary()}"
+            )
+
+    cpu, gated_cpu, lost = totals
+    print(
+        f"CPU time {cpu:.1f}s -> {gated_cpu:.1f}s "
+        f"({1 - gated_cpu / cpu if cpu else 0.0:.0%} saved), {lost} reps off"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import find_videos  # noqa: E402
+from counters import COUNTERS  # noqa: E402
+from engine import open_pose, run_exercise, video_clock  # noqa: E402
+from pipeline import StageStats  # noqa: E402
+from roi import RoiTracker  # noqa: E402
+
+
+def configurations(width):
+    return {
+        "full frame": lambda: None,
+        f"width {width}": lambda: RoiTracker(width, track=False),
+        "roi": lambda: RoiTracker(track=True),
+        f"roi + width {width}": lambda: RoiTracker(width, track=True),
+    }
+
+
+def score(path, exercise, region):
+    cap = cv2.VideoCapture(path)
+    stats = StageStats("inference")
+    started = time.perf_counter()
+    with open_pose() as pose:
+        count = run_exercise(
+            cap,
+            COUNTERS[exercise](),
+            target=None,
+            show=False,
+            pose=pose,
+            stats=stats,
+            region=region,
+            clock=video_clock(cap),
+        )
+    cap.release()
+    return count, stats.frames / (time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare FPS and rep counts of full-frame, downscaled and ROI inference."
+    )
+    parser.add_argument("exercise", choices=sorted(COUNTERS))
+    parser.add_argument("videos", nargs="+", help="recorded clips to score")
+    parser.add_argument("--width", type=int, default=320)
+    args = parser.parse_args(argv)
+
+    paths = find_videos(args.videos)
+    totals = {name: [0.0, 0] for name in configurations(args.width)}
+    for path in paths:
+        print(path)
+        baseline = None
+        for name, make_region in configurations(args.width).items():
+            count, fps = score(path, args.exercise, make_region())
+            if baseline is None:
+                baseline = (count, fps)
+            totals[name][0] += fps / baseline[1]
+            totals[name][1] += abs(count - baseline[0])
+            print(f"  {name:>18}: {count:3d} reps  {fps:7.1f} fps")
+
+    print("Summary against full frame:")
+    for name, (speedup, errors) in totals.items():
+        print(
+            f"  {name:>18}: {speedup / len(paths):.2f}x fps, "
+            f"{errors} reps off over {len(paths)} clips"
+        )
+
+
+if __name__ == "__main__":
+    main()
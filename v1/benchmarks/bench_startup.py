@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+V1_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MENU_PROMPT = b"Enter your choice"
+SESSION_READY = b"Session ready"
+
+
+def wait_for(process, marker, output, timeout):
+    deadline = time.perf_counter() + timeout
+    while marker not in output:
+        if time.perf_counter() > deadline or process.poll() is not None:
+            raise RuntimeError(f"{marker.decode()!r} never appeared:\n{output.decode()}")
+        output += os.read(process.stdout.fileno(), 4096)
+    return output
+
+
+def measure(camera, timeout):
+    with tempfile.TemporaryDirectory() as directory:
+        command = [
+            sys.executable,
+            "-u",
+            "main.py",
+            "--local-results",
+            os.path.join(directory, "results.jsonl"),
+            "--journal",
+            os.path.join(directory, "journal.jsonl"),
+            "--store",
+            os.path.join(directory, "workouts.db"),
+        ]
+        if camera:
+            command += ["--camera", camera]
+
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            command,
+            cwd=V1_DIR,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        try:
+            output = wait_for(process, MENU_PROMPT, b"", timeout)
+            timings = {"first_menu_prompt": time.perf_counter() - started}
+            if camera:
+                process.stdin.write(b"1\n")
+                process.stdin.flush()
+                wait_for(process, SESSION_READY, output, timeout)
+                timings["first_processed_frame"] = time.perf_counter() - started
+        finally:
+            process.kill()
+            process.wait()
+    return timings
+
+
+def import_time(module):
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", f"import {module}"], capture_output=True
+    )
+    if completed.returncode:
+        return None
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Time from launching main.py to the first menu prompt and first processed frame."
+    )
+    parser.add_argument(
+        "--camera",
+        help="camera index or video file; enables the first-processed-frame timing",
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--json", metavar="PATH", help="also write results as JSON")
+    args = parser.parse_args(argv)
+
+    runs = [measure(args.camera, args.timeout) for _ in range(args.runs)]
+    results = {
+        name: statistics.median(run[name] for run in runs) for name in runs[0]
+    }
+    # What an eager import at module load used to cost before the first prompt.
+    for module in ("mediapipe", "firebase_admin.firestore"):
+        seconds = import_time(module)
+        if seconds is not None:
+            results[f"import {module}"] = seconds
+
+    for name, seconds in results.items():
+        print(f"{name:>32}: {seconds * 1000:8.0f} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({name: round(seconds, 4) for name, seconds in results.items()}, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from counters import COUNTERS  # noqa: E402
+from workouts import PERIODS, WorkoutStore  # noqa: E402
+
+# The same totals as the rollups, computed from the sets table every time.
+SCAN = {
+    "day": "date(timestamp, 'unixepoch', 'localtime')",
+    "week": "date(timestamp, 'unixepoch', 'localtime', 'weekday 0', '-6 days')",
+    "month": "date(timestamp, 'unixepoch', 'localtime', 'start of month')",
+}
+
+
+def history(users, years, sets_per_day, seed=0):
+    rng = random.Random(seed)
+    start = datetime.now().replace(microsecond=0) - timedelta(days=365 * years)
+    for day in range(365 * years):
+        for user in users:
+            for _ in range(sets_per_day):
+                moment = start + timedelta(days=day, seconds=rng.randrange(86400))
+                count = rng.randrange(5, 21)
+                yield {
+                    "id": uuid.uuid4().hex,
+                    "user_id": user,
+                    "exercise": rng.choice(sorted(COUNTERS)),
+                    "count": count,
+                    "timestamp": moment.isoformat(),
+                    "reps": [
+                        moment.timestamp() + rep * 2.5 for rep in range(count)
+                    ],
+                }
+
+
+def timed(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Time inserts and aggregate queries on a workout store filled "
+        "with years of generated history."
+    )
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--sets-per-day", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    users = [f"user-{index}" for index in range(args.users)]
+    with tempfile.TemporaryDirectory() as directory:
+        with WorkoutStore(os.path.join(directory, "workouts.db")) as store:
+            records = list(history(users, args.years, args.sets_per_day))
+            started = time.perf_counter()
+            for index in range(0, len(records), 20):
+                store.write(records[index : index + 20])
+            seconds = time.perf_counter() - started
+            reps = sum(len(record["reps"]) for record in records)
+            print(
+                f"Inserted {len(records)} sets and {reps} reps in {seconds:.1f}s "
+                f"({len(records) / seconds:.0f} sets/sec, batches of 20)"
+            )
+
+            user = users[0]
+            for period in PERIODS:
+                rollup_ms, rows = timed(lambda: store.totals(user, period), args.repeat)
+                scan_ms, scanned = timed(
+                    lambda: store.db.execute(
+                        f"SELECT {SCAN[period]} AS start, exercise, count(*), "
+                        "sum(count) FROM sets WHERE user_id = ? "
+                        "GROUP BY start, exercise ORDER BY start, exercise",
+                        (user,),
+                    ).fetchall(),
+                    args.repeat,
+                )
+                status = "same" if rows == scanned else "DIFFERENT"
+                print(
+                    f"{period:>6} totals, {len(rows):5d} rows: rollups "
+                    f"{rollup_ms:7.2f} ms, scan {scan_ms:8.2f} ms ({status})"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from counters import COUNTERS  # noqa: E402
+from landmarks import (  # noqa: E402
+    LANDMARK_INDEX,
+    calculate_angle,
+    iter_pose_frames,
+    joint_angles,
+    landmark_distances,
+)
+from synthetic import rep_sequence  # noqa: E402
+from traces import replay  # noqa: E402
+
+
+def head_rotation_angle(nose, left_ear, right_ear):
+    a = np.array(nose)
+    b = np.array(left_ear)
+    c = np.array(right_ear)
+    ab = b - a
+    ac = c - a
+    cosine_angle = np.dot(ab, ac) / (np.linalg.norm(ab) * np.linalg.norm(ac))
+    return np.degrees(np.arccos(np.clip(cosine_angle, -1.0, 1.0)))
+
+
+def allocations(func, step, frames, warmup=2):
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        peak -= before
+
+        # As in bench_frames.py: the peak above the baseline during each frame
+        # is what that frame allocates, even if it is all freed again.
+        transient = []
+        for _ in range(frames):
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            step()
+            _, frame_peak = tracemalloc.get_traced_memory()
+            transient.append(frame_peak - baseline)
+    finally:
+        tracemalloc.stop()
+    # The first frames allocate buffers that are reused, so they are left out.
+    steady = transient[warmup:]
+    return {
+        "alloc_peak_kib": round(peak / 1024, 2),
+        "alloc_bytes_per_frame": round(sum(steady) / len(steady), 1),
+        "alloc_bytes_max": max(steady),
+    }
+
+
+def benchmark(name, layer, func, step, frames, repeat, **extra):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    return {
+        "name": name,
+        "layer": layer,
+        "frames": frames,
+        "frames_per_sec": round(frames / best, 1),
+        "us_per_frame": round(best / frames * 1e6, 3),
+        **allocations(func, step, frames),
+        **extra,
+    }
+
+
+def micro_benchmarks(frames, repeat):
+    points = rep_sequence("squats", reps=1)[10]
+    hip, knee, ankle = (
+        points[LANDMARK_INDEX[name], :2].tolist()
+        for name in ("LEFT_HIP", "LEFT_KNEE", "LEFT_ANKLE")
+    )
+    nose, left_ear, right_ear = (
+        points[LANDMARK_INDEX[name], :2].tolist()
+        for name in ("NOSE", "LEFT_EAR", "RIGHT_EAR")
+    )
+
+    def loop(func, *args):
+        return lambda: [func(*args) for _ in range(frames)]
+
+    yield benchmark(
+        "calculate_angle",
+        "micro",
+        loop(calculate_angle, hip, knee, ankle),
+        lambda: calculate_angle(hip, knee, ankle),
+        frames,
+        repeat,
+    )
+    yield benchmark(
+        "head_rotation_cosine",
+        "micro",
+        loop(head_rotation_angle, nose, left_ear, right_ear),
+        lambda: head_rotation_angle(nose, left_ear, right_ear),
+        frames,
+        repeat,
+    )
+    yield benchmark(
+        "joint_angles+distances",
+        "micro",
+        lambda: [
+            (joint_angles(points), landmark_distances(points)) for _ in range(frames)
+        ],
+        lambda: (joint_angles(points), landmark_distances(points)),
+        frames,
+        repeat,
+    )
+
+
+def counter_benchmarks(reps, repeat):
+    for exercise, counter in COUNTERS.items():
+        points = rep_sequence(exercise, reps=reps)
+        counts = []
+
+        def run():
+            counts.append(replay(points, counter()))
+
+        # Allocations are measured on the live path, one PoseFrame at a time.
+        live = counter()
+        pose_frames = iter_pose_frames(points)
+
+        result = benchmark(
+            f"counter[{exercise}]",
+            "state_machine",
+            run,
+            lambda: live.update(next(pose_frames)),
+            len(points),
+            repeat,
+        )
+        result.update(count=counts[-1], expected=reps)
+        yield result
+
+
+def end_to_end_benchmark(video, exercise, repeat):
+    import cv2
+
+    from engine import open_pose, run_exercise, video_clock
+    from pipeline import StageStats
+
+    results = []
+    with open_pose() as pose:
+        for _ in range(repeat):
+            cap = cv2.VideoCapture(video)
+            stats = StageStats("loop")
+            started = time.perf_counter()
+            count = run_exercise(
+                cap,
+                COUNTERS[exercise](),
+                target=None,
+                show=False,
+                pose=pose,
+                stats=stats,
+                clock=video_clock(cap),
+            )
+            results.append((time.perf_counter() - started, stats.frames, count))
+            cap.release()
+            pose.reset()
+
+    seconds, frames, count = min(results)
+    return {
+        "name": f"end_to_end[{exercise}]",
+        "layer": "end_to_end",
+        "frames": frames,
+        "frames_per_sec": round(frames / seconds, 1),
+        "us_per_frame": round(seconds / frames * 1e6, 3),
+        "count": count,
+        "video": video,
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path) as f:
+        baseline = {result["name"]: result for result in json.load(f)["results"]}
+
+    regressions = []
+    for result in results:
+        before = baseline.get(result["name"])
+        if before is None:
+            continue
+        if result["frames_per_sec"] < before["frames_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{result['name']}: {before['frames_per_sec']} -> "
+                f"{result['frames_per_sec']} frames/sec"
+            )
+        # A few bytes of slack, so frames that allocate nothing stay comparable.
+        if "alloc_bytes_per_frame" in before and (
+            result["alloc_bytes_per_frame"]
+            > before["alloc_bytes_per_frame"] * (1 + tolerance) + 16
+        ):
+            regressions.append(
+                f"{result['name']}: {before['alloc_bytes_per_frame']} -> "
+                f"{result['alloc_bytes_per_frame']} bytes allocated/frame"
+            )
+        if result.get("count") != before.get("count"):
+            regressions.append(
+                f"{result['name']}: count {before.get('count')} -> {result.get('count')}"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the angle math, exercise counters and full frame loop."
+    )
+    parser.add_argument("--frames", type=int, default=10000)
+    parser.add_argument("--reps", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--video", help="recorded clip for the end-to-end benchmark")
+    parser.add_argument("--exercise", choices=sorted(COUNTERS), default="squats")
+    parser.add_argument("-o", "--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier JSON results")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="allowed relative frames/sec drop or allocation growth before flagging "
+        "a regression",
+    )
+    args = parser.parse_args(argv)
+
+    results = list(micro_benchmarks(args.frames, args.repeat))
+    results.extend(counter_benchmarks(args.reps, args.repeat))
+    if args.video:
+        results.append(end_to_end_benchmark(args.video, args.exercise, args.repeat))
+
+    for result in results:
+        print(
+            f"{result['name']:>32}: {result['frames_per_sec']:>12.1f} frames/sec  "
+            f"{result['us_per_frame']:>9.3f} us/frame"
+            + (
+                f"  {result['alloc_bytes_per_frame']:>9.1f} bytes allocated/frame"
+                if "alloc_bytes_per_frame" in result
+                else ""
+            )
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "meta": {
+                        "timestamp": datetime.now().isoformat(timespec="seconds"),
+                        "python": platform.python_version(),
+                        "numpy": np.__version__,
+                        "machine": platform.machine(),
+                        "processor": platform.processor(),
+                    },
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
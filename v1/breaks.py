@@ -0,0 +1,116 @@
+import functools
+import math
+import os
+import time
+
+import cv2
+
+BREAK_IMAGE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "images", "rest image.jpg"
+)
+WINDOW_NAME = "Break Time"
+SKIP_KEYS = (ord("q"), ord(" "), 27)
+
+
+def _draw_centered(image, text):
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    font_scale = 1.5
+    font_thickness = 2
+    height, width, _ = image.shape
+    text_size = cv2.getTextSize(text, font, font_scale, font_thickness)[0]
+    origin = ((width - text_size[0]) // 2, (height + text_size[1]) // 2)
+    # White text over a thicker black outline, readable on any background.
+    outlines = ((0, 0, 0), font_thickness + 2), ((255, 255, 255), font_thickness)
+    for color, thickness in outlines:
+        cv2.putText(
+            image, text, origin, font, font_scale, color, thickness, cv2.LINE_AA
+        )
+
+
+@functools.lru_cache(maxsize=4)
+def break_frames(image_path, seconds, size=(800, 600)):
+    # Every countdown frame is rendered once and shown again on later breaks.
+    image = cv2.imread(image_path)
+    if image is None:
+        return None
+    image = cv2.resize(image, size)
+    frames = []
+    for left in range(seconds + 1):
+        frame = image.copy()
+        _draw_centered(frame, f"Break Time: {left} seconds left")
+        frames.append(frame)
+    return frames
+
+
+class BreakScheduler:
+    # Runs the countdown from deadlines instead of one-second sleeps, so the
+    # session can warm up the next exercise meanwhile and the user can skip
+    # the rest of the break. It also remembers when each break ended to time
+    # how long the next exercise takes to count its first frame.
+    def __init__(
+        self,
+        session,
+        seconds=10,
+        show=True,
+        image_path=BREAK_IMAGE,
+        clock=time.perf_counter,
+    ):
+        self.session = session
+        self.seconds = seconds
+        self.show = show
+        self.image_path = image_path
+        self.clock = clock
+        self.ended_at = None
+        self.resume_times = []
+
+    def take_break(self):
+        self.session.prepare()
+        frames = break_frames(self.image_path, self.seconds) if self.show else None
+        if self.show and frames is None:
+            print(f"Break image not found at {self.image_path}.")
+        if frames is not None:
+            cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_NORMAL)
+            cv2.resizeWindow(WINDOW_NAME, 800, 600)
+
+        ends_at = self.clock() + self.seconds
+        shown = None
+        try:
+            while True:
+                remaining = ends_at - self.clock()
+                if remaining <= 0:
+                    break
+                left = math.ceil(remaining)
+                if left != shown:
+                    shown = left
+                    if frames is not None:
+                        cv2.imshow(WINDOW_NAME, frames[left])
+                    else:
+                        print(f"Break Time: {left} seconds left")
+                # Wake up again when the displayed second changes.
+                wait = remaining - (left - 1)
+                if frames is None:
+                    time.sleep(wait)
+                elif cv2.waitKey(max(1, int(wait * 1000))) & 0xFF in SKIP_KEYS:
+                    break
+        except KeyboardInterrupt:
+            print("Break skipped.")
+        finally:
+            if frames is not None:
+                cv2.destroyWindow(WINDOW_NAME)
+        self.ended_at = self.clock()
+
+    def first_frame(self, counted_at):
+        if self.ended_at is None:
+            return
+        self.resume_times.append(counted_at - self.ended_at)
+        self.ended_at = None
+
+    def summary(self):
+        if not self.resume_times:
+            return {}
+        ordered = sorted(self.resume_times)
+        return {
+            "breaks": len(ordered),
+            "resume_mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+            "resume_max_ms": round(ordered[-1] * 1000, 3),
+        }
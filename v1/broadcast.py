@@ -0,0 +1,339 @@
+import asyncio
+import json
+import struct
+import threading
+from collections import deque, namedtuple
+
+import numpy as np
+
+from landmarks import NUM_LANDMARKS
+
+# Every binary message starts with kind, flags, sequence number, frame
+# timestamp and count, followed by the frame's landmarks as (33, 4) x, y, z,
+# visibility, quantized to int16 in units of 1 / SCALE.
+#   KEY:   all 132 values as int16.
+#   DELTA: the change from the previous frame as 132 int8, then the changes
+#          that do not fit in int8 as int16 values followed by their uint8
+#          indices; flags holds how many there are. All arithmetic wraps
+#          around at 16 bits.
+#   EMPTY: no person in the frame, no landmarks.
+# Clients may send back the sequence number of the last frame they handled as
+# a text message, which limits how far ahead of it they are sent frames.
+HEADER = struct.Struct("<BBIdH")
+EMPTY, KEY, DELTA = 0, 1, 2
+SCALE = 4096
+VALUES = NUM_LANDMARKS * 4
+# Past this many escaped values a delta frame is no smaller than a key frame.
+MAX_ESCAPES = VALUES // 3
+
+Frame = namedtuple("Frame", "seq key delta")
+
+
+def quantize(points):
+    scaled = np.rint(np.asarray(points, dtype=np.float32).reshape(-1) * SCALE)
+    return np.clip(scaled, -32767, 32767).astype(np.int16)
+
+
+class FrameEncoder:
+    def __init__(self):
+        self.seq = 0
+        self.previous = None
+
+    def reset(self):
+        self.previous = None
+
+    def encode(self, points, count=0, timestamp=0.0):
+        self.seq += 1
+        count = min(count, 0xFFFF)
+        if points is None:
+            self.previous = None
+            empty = HEADER.pack(EMPTY, 0, self.seq, timestamp, count)
+            return Frame(self.seq, empty, None)
+
+        values = quantize(points)
+        key = HEADER.pack(KEY, 0, self.seq, timestamp, count) + values.tobytes()
+        delta = None
+        if self.previous is not None:
+            change = values - self.previous
+            escaped = np.flatnonzero((change < -127) | (change > 127))
+            if len(escaped) <= MAX_ESCAPES:
+                small = change.astype(np.int8)
+                delta = b"".join(
+                    (
+                        HEADER.pack(DELTA, len(escaped), self.seq, timestamp, count),
+                        small.tobytes(),
+                        change[escaped].tobytes(),
+                        escaped.astype(np.uint8).tobytes(),
+                    )
+                )
+        self.previous = values
+        return Frame(self.seq, key, delta)
+
+
+class FrameDecoder:
+    def __init__(self):
+        self.seq = None
+        self.values = None
+
+    def decode(self, message):
+        # Returns seq, timestamp, count and the (33, 4) landmarks, or None for
+        # the landmarks of a frame without a person.
+        kind, escapes, seq, timestamp, count = HEADER.unpack_from(message)
+        offset = HEADER.size
+        if kind == EMPTY:
+            self.values = None
+        elif kind == KEY:
+            self.values = np.frombuffer(message, np.int16, VALUES, offset).copy()
+        elif kind == DELTA:
+            if self.values is None or seq != self.seq + 1:
+                raise ValueError(f"delta frame {seq} without frame {seq - 1}")
+            change = np.frombuffer(message, np.int8, VALUES, offset).astype(np.int16)
+            offset += VALUES
+            values = np.frombuffer(message, np.int16, escapes, offset)
+            indices = np.frombuffer(message, np.uint8, escapes, offset + 2 * escapes)
+            change[indices] = values
+            self.values += change
+        else:
+            raise ValueError(f"unknown frame kind {kind}")
+        self.seq = seq
+        points = None
+        if self.values is not None:
+            points = self.values.reshape(NUM_LANDMARKS, 4) / np.float32(SCALE)
+        return seq, timestamp, count, points
+
+
+class _Client:
+    def __init__(self, websocket, queue_size):
+        self.websocket = websocket
+        self.frames = deque(maxlen=queue_size)
+        self.messages = deque(maxlen=64)
+        self.ready = asyncio.Event()
+        self.last_seq = None
+        # Sequence numbers of frames sent since the last acknowledged one, once
+        # the client has acknowledged anything.
+        self.in_flight = None
+        self.sent = 0
+        self.sent_bytes = 0
+        self.dropped = 0
+
+
+class LandmarkPublisher:
+    # Serves every inferred frame's landmarks and the live count to any number
+    # of WebSocket clients from a background event loop. Each frame is encoded
+    # once, in the caller's thread. Every client then gets the key or delta
+    # form: a delta only if it was sent the frame before. A client that cannot
+    # keep up keeps only its queue_size newest frames, and after a dropped
+    # frame it is sent the next one as a key frame.
+    #
+    # Frames are only a few hundred bytes, so socket buffers alone let a slow
+    # client fall seconds behind before send() ever waits. Clients that
+    # acknowledge frames are also skipped while max_in_flight frames sent to
+    # them are unacknowledged, which bounds their lag to about that many.
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=8765,
+        queue_size=2,
+        max_in_flight=15,
+        write_limit=2048,
+    ):
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.max_in_flight = max_in_flight
+        self.write_limit = write_limit
+        self.encoder = FrameEncoder()
+        self.clients = set()
+        self.current = None
+        self.published = 0
+        # Totals of clients that have disconnected.
+        self.served = 0
+        self.sent = 0
+        self.sent_bytes = 0
+        self.dropped = 0
+        self.loop = None
+        self._stop = None
+        self._started = threading.Event()
+        self._thread = None
+        self._error = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self._serve())
+        except Exception as e:
+            self._error = e
+            self._started.set()
+        finally:
+            self.loop.close()
+
+    async def _serve(self):
+        from websockets.asyncio.server import serve
+
+        # Landmarks are already compact, so per-message deflate would only
+        # cost CPU for every client.
+        async with serve(
+            self._handle,
+            self.host,
+            self.port,
+            compression=None,
+            write_limit=self.write_limit,
+        ) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            self._stop = self.loop.create_future()
+            self._started.set()
+            await self._stop
+
+    async def _handle(self, websocket):
+        client = _Client(websocket, self.queue_size)
+        if self.current is not None:
+            client.messages.append(self.current)
+        client.ready.set()
+        self.clients.add(client)
+        sender = asyncio.ensure_future(self._send(client))
+        receiver = asyncio.ensure_future(self._receive(client))
+        try:
+            await asyncio.wait([sender, receiver], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            receiver.cancel()
+            sender.cancel()
+            self.clients.discard(client)
+            self.served += 1
+            self.sent += client.sent
+            self.sent_bytes += client.sent_bytes
+            self.dropped += client.dropped
+
+    async def _receive(self, client):
+        # Ends when the connection closes.
+        async for message in client.websocket:
+            try:
+                acked = int(message)
+            except ValueError:
+                continue
+            if client.in_flight is None:
+                client.in_flight = deque()
+            while client.in_flight and client.in_flight[0] <= acked:
+                client.in_flight.popleft()
+
+    async def _send(self, client):
+        websocket = client.websocket
+        while True:
+            await client.ready.wait()
+            client.ready.clear()
+            while client.messages or client.frames:
+                if client.messages:
+                    await websocket.send(client.messages.popleft())
+                    continue
+                frame = client.frames.popleft()
+                in_flight = client.in_flight
+                if in_flight is not None and len(in_flight) >= self.max_in_flight:
+                    client.dropped += 1
+                    continue
+                data = frame.key
+                if frame.delta is not None and client.last_seq == frame.seq - 1:
+                    data = frame.delta
+                # Waits while the client's socket buffer is above write_limit,
+                # which is when its frame queue starts dropping.
+                await websocket.send(data)
+                if in_flight is not None:
+                    in_flight.append(frame.seq)
+                client.last_seq = frame.seq
+                client.sent += 1
+                client.sent_bytes += len(data)
+
+    def _fanout(self, frame):
+        for client in self.clients:
+            if len(client.frames) == client.frames.maxlen:
+                client.dropped += 1
+            client.frames.append(frame)
+            client.ready.set()
+
+    def _broadcast(self, message):
+        for client in self.clients:
+            client.messages.append(message)
+            client.ready.set()
+
+    def _call(self, callback, *args):
+        try:
+            self.loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # The loop has already been closed.
+            pass
+
+    def publish(self, points, count, timestamp):
+        if not self.clients:
+            # Nobody would get a delta against this frame anyway.
+            self.encoder.reset()
+            return
+        frame = self.encoder.encode(points, count, timestamp)
+        self.published += 1
+        self._call(self._fanout, frame)
+
+    def publish_frame(self, pose_frame, count):
+        points = pose_frame.points if pose_frame.detected else None
+        self.publish(points, count, pose_frame.timestamp)
+
+    def announce(self, message, current=False):
+        # JSON text messages. The current one is also sent to clients that
+        # connect later.
+        message = json.dumps(message)
+        if current:
+            self.current = message
+        self._call(self._broadcast, message)
+
+    def start_set(self, counter):
+        self.announce(
+            {"type": "exercise", "exercise": counter.key, "label": counter.label},
+            current=True,
+        )
+
+    def rep(self, event):
+        self.announce({"type": "rep", **event._asdict()})
+
+    def summary(self):
+        clients = list(self.clients)
+        sent = self.sent + sum(client.sent for client in clients)
+        sent_bytes = self.sent_bytes + sum(client.sent_bytes for client in clients)
+        dropped = self.dropped + sum(client.dropped for client in clients)
+        size = sent_bytes / sent if sent else 0.0
+        served = self.served + len(clients)
+        return (
+            f"broadcast: {self.published} frames to {served} clients, "
+            f"{size:.0f} bytes/frame, {dropped} dropped for slow clients"
+        )
+
+    def close(self):
+        if self._stop is not None:
+            self.loop.call_soon_threadsafe(self._stop.set_result, None)
+        if self._thread is not None:
+            self._thread.join(5.0)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def add_broadcast_arguments(parser):
+    parser.add_argument(
+        "--broadcast",
+        type=int,
+        metavar="PORT",
+        help="stream landmarks and counts to WebSocket clients on PORT",
+    )
+    parser.add_argument("--broadcast-host", default="127.0.0.1")
+
+
+def publisher_from_args(args):
+    if args.broadcast is None:
+        return None
+    return LandmarkPublisher(args.broadcast_host, args.broadcast)
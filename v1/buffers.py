@@ -0,0 +1,45 @@
+import threading
+
+import numpy as np
+
+
+class FrameBuffers:
+    # Scratch arrays for one frame loop, reallocated only when the frame size changes.
+    def __init__(self):
+        self._arrays = {}
+        self.allocations = 0
+
+    def get(self, name, shape, dtype=np.uint8):
+        array = self._arrays.get(name)
+        if array is None or array.shape != shape:
+            array = self._arrays[name] = np.empty(shape, dtype=dtype)
+            self.allocations += 1
+        return array
+
+
+class FramePool:
+    # Capture buffers passed between threads. Whoever is last to use a frame
+    # releases it, and the next read decodes into it instead of a new array.
+    def __init__(self, capacity=8):
+        self.capacity = capacity
+        self.allocations = 0
+        self._free = []
+        self._lock = threading.Lock()
+
+    def read(self, cap):
+        with self._lock:
+            buffer = self._free.pop() if self._free else None
+        ret, frame = cap.read(buffer)
+        if not ret:
+            self.release(buffer)
+            return False, None
+        if frame is not buffer:
+            self.allocations += 1
+        return True, frame
+
+    def release(self, frame):
+        if frame is None:
+            return
+        with self._lock:
+            if len(self._free) < self.capacity:
+                self._free.append(frame)
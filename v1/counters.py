@@ -0,0 +1,16 @@
+import os
+
+from exercises import load_exercises
+
+
+EXERCISES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "exercises.json"
+)
+
+COUNTERS = load_exercises(EXERCISES_PATH)
+
+SquatCounter = COUNTERS["squats"]
+PushupCounter = COUNTERS["pushups"]
+HeadRotationCounter = COUNTERS["head_rotation"]
+JumpingJackCounter = COUNTERS["jumping jacks"]
+AlternateToeTouchCounter = COUNTERS["alternate_toe_touches"]
@@ -0,0 +1,282 @@
+import time
+from contextlib import nullcontext
+
+import cv2
+import numpy as np
+
+from backends import OnnxPose, TasksPose, default_model, process_batch
+from buffers import FrameBuffers
+from landmarks import POSE_CONNECTIONS, PoseFrame
+from profiling import NULL_PROFILER
+
+
+LANDMARK_COLOR = (0, 0, 255)
+CONNECTION_COLOR = (224, 224, 224)
+VISIBILITY_THRESHOLD = 0.5
+POSE_PROFILES = {"lite": 0, "full": 1, "heavy": 2}
+POSE_BACKENDS = ("mediapipe", "tasks", "onnx")
+
+
+def open_pose(profile="full", smooth_landmarks=True):
+    # MediaPipe takes seconds to import, so it is only loaded with the first model.
+    import mediapipe as mp
+
+    return mp.solutions.pose.Pose(
+        model_complexity=POSE_PROFILES[profile],
+        smooth_landmarks=smooth_landmarks,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5,
+    )
+
+
+def open_backend(
+    backend="mediapipe", profile="full", smooth_landmarks=True, model=None, threads=None
+):
+    if backend == "mediapipe":
+        return open_pose(profile, smooth_landmarks)
+    if model is None:
+        model = default_model(backend, profile)
+    if backend == "tasks":
+        return TasksPose(model)
+    return OnnxPose(model, threads)
+
+
+def add_pose_arguments(parser):
+    parser.add_argument(
+        "--backend",
+        choices=POSE_BACKENDS,
+        default="mediapipe",
+        help="pose model runtime: the MediaPipe solution, MediaPipe Tasks "
+        "PoseLandmarker or ONNX Runtime",
+    )
+    parser.add_argument(
+        "--model",
+        metavar="PATH",
+        help="model file for the tasks and onnx backends "
+        "(default: models/ for the chosen --profile)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        help="intra-op threads per model for the onnx backend",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=POSE_PROFILES,
+        default="full",
+        help="pose model complexity (lite is fastest, heavy most accurate)",
+    )
+    parser.add_argument(
+        "--no-smoothing",
+        dest="smooth_landmarks",
+        action="store_false",
+        help="disable MediaPipe's landmark smoothing between frames",
+    )
+
+
+def pose_from_args(args):
+    return open_backend(
+        args.backend, args.profile, args.smooth_landmarks, args.model, args.threads
+    )
+
+
+def infer(
+    pose,
+    frame,
+    pose_frame,
+    region=None,
+    profiler=NULL_PROFILER,
+    timestamp=None,
+    buffers=None,
+):
+    started = profiler.mark()
+    image = frame if region is None else region.crop(frame, buffers)
+    rgb = None if buffers is None else buffers.get("rgb", image.shape)
+    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=rgb)
+    image.flags.writeable = False
+    started = profiler.record("preprocess", started)
+    results = pose.process(image)
+    image.flags.writeable = True
+    started = profiler.record("inference", started)
+    pose_frame.update(results.pose_landmarks, timestamp)
+    if region is not None:
+        region.update(pose_frame)
+    profiler.record("landmarks", started)
+    return pose_frame.detected
+
+
+def video_clock(cap):
+    # Recorded videos decode faster than real time, so counters follow the
+    # file's own timestamps instead of the wall clock.
+    return lambda: cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+
+
+def update_counter(counter, pose_frame, verbose=True):
+    added = pose_frame.detected and counter.update(pose_frame)
+    if added and verbose:
+        print(f"{counter.label}: {counter.count}")
+
+
+def draw_pose(image, points, colors=()):
+    landmark_color, connection_color = colors or (LANDMARK_COLOR, CONNECTION_COLOR)
+    height, width = image.shape[:2]
+    pixels = (points[:, :2] * (width, height)).astype(np.int32)
+    visible = (points[:, 3] >= VISIBILITY_THRESHOLD) & np.all(
+        (points[:, :2] >= 0) & (points[:, :2] <= 1), axis=1
+    )
+
+    segments = POSE_CONNECTIONS[visible[POSE_CONNECTIONS].all(axis=1)]
+    cv2.polylines(image, list(pixels[segments]), False, connection_color, 2)
+    for x, y in pixels[visible].tolist():
+        cv2.circle(image, (x, y), 3, CONNECTION_COLOR, 2)
+        cv2.circle(image, (x, y), 2, landmark_color, 2)
+
+
+def render(image, points, counter, profiler=NULL_PROFILER):
+    started = profiler.mark()
+    cv2.putText(
+        image,
+        f"{counter.label}: {counter.count}",
+        (10, 50),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        1,
+        (0, 255, 0),
+        2,
+        cv2.LINE_AA,
+    )
+    if points is not None:
+        draw_pose(image, points, counter.drawing_colors)
+    profiler.overlay(image)
+    started = profiler.record("draw", started)
+    cv2.imshow(counter.window_name, image)
+    profiler.record("imshow", started)
+
+
+def _passes_gate(gate, frame, timestamp, profiler):
+    started = profiler.mark()
+    passed = gate.should_infer(frame, timestamp)
+    profiler.record("motion", started)
+    return passed
+
+
+def run_exercise(
+    cap,
+    counter,
+    target=10,
+    show=True,
+    pose=None,
+    stats=None,
+    recorder=None,
+    region=None,
+    scheduler=None,
+    profiler=NULL_PROFILER,
+    clock=time.perf_counter,
+    on_first_frame=None,
+    gate=None,
+    publisher=None,
+):
+    pose_frame = PoseFrame()
+    buffers = FrameBuffers()
+    frame = None
+    if show:
+        cv2.namedWindow(counter.window_name, cv2.WINDOW_NORMAL)
+        cv2.resizeWindow(counter.window_name, 800, 600)
+
+    try:
+        with open_pose() if pose is None else nullcontext(pose) as pose:
+            while cap.isOpened() and (target is None or counter.count < target):
+                started = time.perf_counter()
+                ret, frame = cap.read(frame)
+                if not ret:
+                    break
+                profiler.record("capture", started)
+
+                timestamp = clock()
+                if (scheduler is None or scheduler.should_infer()) and (
+                    gate is None or _passes_gate(gate, frame, timestamp, profiler)
+                ):
+                    inferred_at = time.perf_counter()
+                    infer(
+                        pose, frame, pose_frame, region, profiler, timestamp, buffers
+                    )
+                    if gate is not None:
+                        gate.record(pose_frame)
+                    if scheduler is not None:
+                        scheduler.record(time.perf_counter() - inferred_at)
+                        for skipped in scheduler.interpolate(pose_frame):
+                            update_counter(counter, skipped, verbose=show)
+
+                    counted_at = profiler.mark()
+                    update_counter(counter, pose_frame, verbose=show)
+                    profiler.record("counter", counted_at)
+                    if on_first_frame is not None:
+                        on_first_frame(time.perf_counter())
+                        on_first_frame = None
+                    if recorder is not None:
+                        recorder.append(pose_frame, pose_frame.timestamp)
+                    if publisher is not None:
+                        publisher.publish_frame(pose_frame, counter.count)
+                if stats is not None:
+                    stats.record(started)
+
+                if show:
+                    points = pose_frame.points if pose_frame.detected else None
+                    render(frame, points, counter, profiler)
+                    waited_at = profiler.mark()
+                    key = cv2.waitKey(1)
+                    profiler.record("wait_key", waited_at)
+                    if key & 0xFF == ord("q"):
+                        break
+
+    except KeyboardInterrupt:
+        print(f"{counter.label} detection stopped by user.")
+
+    finally:
+        if show:
+            cv2.destroyAllWindows()
+
+    counter.finish()
+    return counter.count
+
+
+def run_batched(
+    cap,
+    counter,
+    pose,
+    batch_size=16,
+    stats=None,
+    recorder=None,
+    clock=time.perf_counter,
+):
+    # Offline counting for backends without tracking state: a batch of frames
+    # goes through the model at once, then the counter sees them in order.
+    pose_frame = PoseFrame()
+    frames = [None] * batch_size
+    rgb = [None] * batch_size
+    while cap.isOpened():
+        started = time.perf_counter()
+        timestamps = []
+        for slot in range(batch_size):
+            ret, frames[slot] = cap.read(frames[slot])
+            if not ret:
+                break
+            timestamps.append(clock())
+            rgb[slot] = cv2.cvtColor(frames[slot], cv2.COLOR_BGR2RGB, dst=rgb[slot])
+        if not timestamps:
+            break
+
+        for result, timestamp in zip(
+            process_batch(pose, rgb[: len(timestamps)]), timestamps
+        ):
+            pose_frame.update(result.pose_landmarks, timestamp)
+            update_counter(counter, pose_frame, verbose=False)
+            if recorder is not None:
+                recorder.append(pose_frame, timestamp)
+            if stats is not None:
+                # The whole batch's time goes to its first frame.
+                stats.record(started)
+                started = time.perf_counter()
+        if len(timestamps) < batch_size:
+            break
+    counter.finish()
+    return counter.count
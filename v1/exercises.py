@@ -0,0 +1,312 @@
+import json
+import math
+
+import numpy as np
+
+from filters import OneEuroFilter
+from landmarks import (
+    ANGLE_TRIPLETS,
+    DISTANCE_PAIRS,
+    LANDMARK_INDEX,
+    joint_angles,
+    landmark_distances,
+)
+from reps import RepEvent
+
+
+FEATURE_KINDS = {"angle": 3, "distance": 2, "rise": 2}
+# Angles are in degrees, distances and rises in frame sizes, so each kind
+# needs its own filter speed scale.
+DEFAULT_FILTERS = {
+    "angle": {"min_cutoff": 3.0, "beta": 0.02},
+    "distance": {"min_cutoff": 3.0, "beta": 2.0},
+    "rise": {"min_cutoff": 3.0, "beta": 2.0},
+}
+DEFAULT_HOLD = 0.1
+
+
+def _table_index(rows, table):
+    index = []
+    for row in rows.tolist():
+        if row not in table.tolist():
+            return None
+        index.append(table.tolist().index(row))
+    return index
+
+
+class ExerciseProgram:
+    # One exercise definition compiled into landmark index tables and
+    # per-phase thresholds. Features are vectorized over whole traces, while
+    # counters step through the phases one frame at a time.
+    def __init__(self, definition):
+        tables = {kind: [] for kind in FEATURE_KINDS}
+        filters = {kind: [] for kind in FEATURE_KINDS}
+        features = {}
+        for name, feature in definition["features"].items():
+            feature = dict(feature)
+            settings = feature.pop("filter", {})
+            if len(feature) != 1 or next(iter(feature)) not in FEATURE_KINDS:
+                raise ValueError(
+                    f"feature {name!r} needs exactly one of {', '.join(FEATURE_KINDS)}"
+                )
+            kind, groups = next(iter(feature.items()))
+            table = tables[kind]
+            start = len(table)
+            for group in groups:
+                if len(group) != FEATURE_KINDS[kind]:
+                    raise ValueError(
+                        f"{kind} in feature {name!r} takes "
+                        f"{FEATURE_KINDS[kind]} landmarks"
+                    )
+                table.append([LANDMARK_INDEX[landmark] for landmark in group])
+            filters[kind].extend([{**DEFAULT_FILTERS[kind], **settings}] * len(groups))
+            features[name] = (kind, start, len(table))
+
+        self.triplets = np.array(tables["angle"], dtype=np.intp).reshape(-1, 3)
+        self.pairs = np.array(tables["distance"], dtype=np.intp).reshape(-1, 2)
+        self.rises = np.array(tables["rise"], dtype=np.intp).reshape(-1, 2)
+        offsets = {
+            "angle": 0,
+            "distance": len(self.triplets),
+            "rise": len(self.triplets) + len(self.pairs),
+        }
+        self.size = offsets["rise"] + len(self.rises)
+        settings = [setting for kind in FEATURE_KINDS for setting in filters[kind]]
+
+        # Every phase becomes "active while all of its signals are high" by
+        # flipping the sign of phases whose active side is low. Counters step
+        # through a few signals per frame, so the per-phase tables are plain
+        # lists: Python floats are much faster than numpy at that size.
+        self.phases = list(definition["phases"])
+        signals, signs, ranges = [], [], []
+        enters, exits, holds, count_on_enter = [], [], [], []
+        for name in self.phases:
+            phase = definition["phases"][name]
+            kind, start, stop = features[phase["feature"]]
+            sign = -1.0 if phase["enter"] < phase["exit"] else 1.0
+            ranges.append((len(signals), len(signals) + stop - start))
+            signals.extend(range(offsets[kind] + start, offsets[kind] + stop))
+            signs.extend([sign] * (stop - start))
+            enters.append(sign * phase["enter"])
+            exits.append(sign * phase["exit"])
+            holds.append(phase.get("hold", DEFAULT_HOLD))
+            if phase.get("count", "enter") not in ("enter", "exit"):
+                raise ValueError(f"phase {name!r} counts on 'enter' or 'exit'")
+            count_on_enter.append(phase.get("count", "enter") == "enter")
+
+        self.signals = np.array(signals, dtype=np.intp)
+        self.signs = np.array(signs)
+        self.ranges = ranges
+        self.phase_signs = [signs[start] for start, _ in ranges]
+        self.min_cutoff = [settings[signal]["min_cutoff"] for signal in signals]
+        self.beta = [settings[signal]["beta"] for signal in signals]
+        self.enter = enters
+        self.exit = exits
+        self.hold = holds
+        self.count_on_enter = count_on_enter
+        self.alternate = definition.get("alternate", False)
+
+        # PoseFrame already computes the standard angles and distances, so
+        # signals that only use those are read from it instead of recomputed.
+        angle_index = _table_index(self.triplets, ANGLE_TRIPLETS)
+        distance_index = _table_index(self.pairs, DISTANCE_PAIRS)
+        self.sources = None
+        if angle_index is not None and distance_index is not None:
+            self.sources = []
+            for signal, sign in zip(signals, signs):
+                if signal < offsets["distance"]:
+                    source = ("angles", angle_index[signal])
+                elif signal < offsets["rise"]:
+                    source = ("distances", distance_index[signal - offsets["distance"]])
+                else:
+                    rise = self.rises[signal - offsets["rise"]]
+                    source = ("points", tuple(rise.tolist()))
+                self.sources.append(source + (sign,))
+
+    def features(self, points):
+        # Works on one (33, 4) frame or a whole (n, 33, 4) trace.
+        values = np.empty(points.shape[:-2] + (self.size,), dtype=np.float64)
+        angles = len(self.triplets)
+        distances = angles + len(self.pairs)
+        if angles:
+            values[..., :angles] = joint_angles(points, self.triplets)
+        if len(self.pairs):
+            values[..., angles:distances] = landmark_distances(points, self.pairs)
+        if len(self.rises):
+            values[..., distances:] = (
+                points[..., self.rises[:, 1], 1] - points[..., self.rises[:, 0], 1]
+            )
+        return values
+
+    def phase_signals(self, values):
+        return values[..., self.signals] * self.signs
+
+    def frame_signals(self, frame):
+        if self.sources is None:
+            return self.phase_signals(self.features(frame.points)).tolist()
+        signals = []
+        for source, index, sign in self.sources:
+            if source == "points":
+                first, second = index
+                value = frame.points.item(second, 1) - frame.points.item(first, 1)
+            else:
+                value = getattr(frame, source).item(index)
+            signals.append(sign * value)
+        return signals
+
+
+class ExerciseCounter:
+    program = None
+
+    def __init__(self, events=None):
+        program = self.program
+        phases = len(program.phases)
+        self.count = 0
+        self.stage = None
+        self.filter = OneEuroFilter(program.min_cutoff, program.beta)
+        self.active = [False] * phases
+        # None until a phase has held its first state long enough to be known.
+        self.state = [None] * phases
+        self.since = [None] * phases
+        self.timestamp = None
+
+        # Rep tracking for event subscribers, all per phase: the mean of the
+        # phase's signals, its lowest and highest values since the last rep
+        # ended, when the phase last rested and when its current rep started,
+        # and the number of the rep counted in the current cycle.
+        self.events = events
+        self.levels = [0.0] * phases
+        self.lows = [math.inf] * phases
+        self.highs = [-math.inf] * phases
+        self.rested_at = [None] * phases
+        self.started_at = [None] * phases
+        self.pending = [0] * phases
+        self.first_timestamp = None
+
+    def _end_rep(self, phase, end):
+        program = self.program
+        number = self.pending[phase]
+        sign = program.phase_signs[phase]
+        low, high = sorted((sign * self.lows[phase], sign * self.highs[phase]))
+        start = self.started_at[phase]
+        if start is None:
+            start = self.first_timestamp
+        self.lows[phase] = self.highs[phase] = self.levels[phase]
+        self.pending[phase] = 0
+        if number:
+            self.events.publish(
+                RepEvent(
+                    self.key,
+                    program.phases[phase],
+                    number,
+                    start,
+                    end,
+                    end - start,
+                    low,
+                    high,
+                    high - low,
+                )
+            )
+
+    def update(self, frame):
+        return self.step(self.program.frame_signals(frame), frame.timestamp)
+
+    def step(self, signals, timestamp):
+        # Takes one frame's phase signals as a list of floats.
+        program = self.program
+        signals = self.filter(signals, timestamp)
+        previous = timestamp if self.timestamp is None else self.timestamp
+        self.timestamp = timestamp
+        tracking = self.events is not None
+        if tracking and self.first_timestamp is None:
+            self.first_timestamp = timestamp
+
+        active = self.active
+        state = self.state
+        since = self.since
+        added = 0
+        ended = None
+        for phase, (start, stop) in enumerate(program.ranges):
+            group = signals[start:stop]
+            if min(group) > program.enter[phase]:
+                active[phase] = True
+            elif max(group) < program.exit[phase]:
+                active[phase] = False
+                if tracking:
+                    self.rested_at[phase] = timestamp
+            if tracking:
+                level = self.levels[phase] = sum(group) / len(group)
+                if level < self.lows[phase]:
+                    self.lows[phase] = level
+                if level > self.highs[phase]:
+                    self.highs[phase] = level
+
+            now = active[phase]
+            if now == state[phase]:
+                since[phase] = None
+                continue
+            if since[phase] is None:
+                since[phase] = previous
+            if timestamp - since[phase] <= program.hold[phase]:
+                continue
+
+            # The new state has held long enough to be accepted.
+            was = state[phase]
+            changed_at = since[phase]
+            state[phase] = now
+            since[phase] = None
+            if now:
+                self.started_at[phase] = self.rested_at[phase]
+            elif was:
+                # A rep ends when its phase is back at rest, which for phases
+                # counted on enter is some time after the count.
+                if ended is None:
+                    ended = []
+                ended.append((phase, changed_at))
+            if was is None or now != program.count_on_enter[phase]:
+                continue
+            if program.alternate and self.stage == phase:
+                continue
+            self.stage = phase
+            added += 1
+            self.pending[phase] = self.count + added
+
+        self.count += added
+        if tracking and ended is not None:
+            for phase, end in ended:
+                self._end_rep(phase, end)
+        return added
+
+    def finish(self):
+        # Publishes reps that were counted but whose phase has not come back to
+        # rest yet, as when a set stops at its target at the bottom of a squat.
+        if self.events is not None:
+            for phase, number in enumerate(self.pending):
+                if number:
+                    self._end_rep(phase, self.timestamp)
+
+
+def compile_exercise(key, definition):
+    name = "".join(part.capitalize() for part in key.replace("_", " ").split())
+    return type(
+        f"{name}Counter",
+        (ExerciseCounter,),
+        {
+            "key": key,
+            "label": definition["label"],
+            "window_name": definition.get("window_name", definition["label"]),
+            "drawing_colors": tuple(
+                tuple(color) for color in definition.get("drawing_colors", ())
+            ),
+            "program": ExerciseProgram(definition),
+        },
+    )
+
+
+def load_exercises(path):
+    with open(path) as f:
+        definitions = json.load(f)
+    return {
+        key: compile_exercise(key, definition)
+        for key, definition in definitions.items()
+    }
@@ -0,0 +1,50 @@
+import math
+
+
+def _smoothing_factor(cutoff, dt):
+    # 1 / (1 + tau / dt) with tau = 1 / (2 pi cutoff).
+    scaled = cutoff * (2 * math.pi * dt)
+    return scaled / (scaled + 1.0)
+
+
+class OneEuroFilter:
+    # Casiez et al.: the cutoff rises with speed, so slow drift is smoothed hard
+    # while fast movement passes with little lag, at any frame rate. Filters a
+    # list of floats, with min_cutoff and beta given per value.
+    def __init__(self, min_cutoff, beta, derivative_cutoff=1.0):
+        self.min_cutoff = list(min_cutoff)
+        self.beta = list(beta)
+        self.derivative_cutoff = derivative_cutoff
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.derivative = None
+        self.timestamp = None
+
+    def __call__(self, value, timestamp):
+        if self.value is None:
+            self.value = list(value)
+            self.derivative = [0.0] * len(self.value)
+            self.timestamp = timestamp
+            return self.value
+
+        dt = timestamp - self.timestamp
+        if dt <= 0:
+            return self.value
+        self.timestamp = timestamp
+
+        filtered = self.value
+        derivatives = self.derivative
+        alpha = _smoothing_factor(self.derivative_cutoff, dt)
+        scale = 2 * math.pi * dt
+        for index, new in enumerate(value):
+            change = new - filtered[index]
+            derivative = derivatives[index]
+            derivative += alpha * (change / dt - derivative)
+            derivatives[index] = derivative
+            cutoff = self.min_cutoff[index] + self.beta[index] * abs(derivative)
+            scaled = cutoff * scale
+            filtered[index] += scaled / (scaled + 1.0) * change
+        return filtered
+
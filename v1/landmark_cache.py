@@ -0,0 +1,98 @@
+import glob
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LandmarkCache:
+    # Landmarks of whole videos, keyed by the video's content and the pose
+    # model settings. Row i of an entry holds frame i. Points (NaN where no pose
+    # was found) and timestamps are plain .npy files, opened memory-mapped.
+    # An entry's files are touched on every hit. Once the directory is over
+    # max_bytes, the least recently used entries are deleted first. This
+    # works across processes without a shared index.
+    def __init__(self, directory, max_bytes=2 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, path, settings):
+        digest = hashlib.sha256(file_digest(path).encode())
+        digest.update(json.dumps(settings, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, f"{key}.{suffix}")
+
+    def load(self, key):
+        try:
+            with open(self._path(key, "json")) as f:
+                info = json.load(f)
+            points = np.load(self._path(key, "points.npy"), mmap_mode="r")
+            timestamps = np.load(self._path(key, "timestamps.npy"), mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            return None
+        now = time.time()
+        for suffix in ("json", "points.npy", "timestamps.npy"):
+            try:
+                os.utime(self._path(key, suffix), (now, now))
+            except FileNotFoundError:
+                pass
+        return points, timestamps, info
+
+    def store(self, key, points, timestamps, **info):
+        # Written under temporary names and renamed, so that other processes
+        # never load a half-written entry. The .json file goes last because
+        # load() reads it first.
+        for suffix, array in (("points.npy", points), ("timestamps.npy", timestamps)):
+            partial = self._path(key, f"{os.getpid()}.{suffix}")
+            np.save(partial, np.ascontiguousarray(array))
+            os.replace(partial, self._path(key, suffix))
+        partial = self._path(key, f"{os.getpid()}.json")
+        with open(partial, "w") as f:
+            json.dump({"frames": len(points), **info}, f)
+        os.replace(partial, self._path(key, "json"))
+        self.evict()
+
+    def entries(self):
+        entries = {}
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            key = os.path.basename(path)[: -len(".json")]
+            if "." in key:
+                continue
+            files = glob.glob(os.path.join(self.directory, f"{key}.*"))
+            try:
+                size = sum(os.path.getsize(name) for name in files)
+                used = os.path.getmtime(path)
+            except FileNotFoundError:
+                continue
+            entries[key] = (used, size, files)
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries().values())
+
+    def evict(self):
+        entries = sorted(self.entries().values())
+        total = sum(size for _, size, _ in entries)
+        for _, size, files in entries:
+            if total <= self.max_bytes:
+                break
+            for name in files:
+                try:
+                    os.remove(name)
+                except FileNotFoundError:
+                    pass
+            total -= size
+        return total
@@ -0,0 +1,166 @@
+import time
+
+import numpy as np
+
+
+POSE_LANDMARKS = (
+    "NOSE",
+    "LEFT_EYE_INNER",
+    "LEFT_EYE",
+    "LEFT_EYE_OUTER",
+    "RIGHT_EYE_INNER",
+    "RIGHT_EYE",
+    "RIGHT_EYE_OUTER",
+    "LEFT_EAR",
+    "RIGHT_EAR",
+    "MOUTH_LEFT",
+    "MOUTH_RIGHT",
+    "LEFT_SHOULDER",
+    "RIGHT_SHOULDER",
+    "LEFT_ELBOW",
+    "RIGHT_ELBOW",
+    "LEFT_WRIST",
+    "RIGHT_WRIST",
+    "LEFT_PINKY",
+    "RIGHT_PINKY",
+    "LEFT_INDEX",
+    "RIGHT_INDEX",
+    "LEFT_THUMB",
+    "RIGHT_THUMB",
+    "LEFT_HIP",
+    "RIGHT_HIP",
+    "LEFT_KNEE",
+    "RIGHT_KNEE",
+    "LEFT_ANKLE",
+    "RIGHT_ANKLE",
+    "LEFT_HEEL",
+    "RIGHT_HEEL",
+    "LEFT_FOOT_INDEX",
+    "RIGHT_FOOT_INDEX",
+)
+NUM_LANDMARKS = len(POSE_LANDMARKS)
+LANDMARK_INDEX = {name: index for index, name in enumerate(POSE_LANDMARKS)}
+# fmt: off
+POSE_CONNECTIONS = np.array(
+    [
+        (0, 1), (1, 2), (2, 3), (3, 7), (0, 4), (4, 5), (5, 6), (6, 8), (9, 10),
+        (11, 12), (11, 13), (13, 15), (15, 17), (15, 19), (15, 21), (17, 19),
+        (12, 14), (14, 16), (16, 18), (16, 20), (16, 22), (18, 20), (11, 23),
+        (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28), (27, 29),
+        (28, 30), (29, 31), (30, 32), (27, 31), (28, 32),
+    ],
+    dtype=np.intp,
+)
+# fmt: on
+
+# Every joint angle the exercises read, as (end, vertex, end) landmark triplets.
+JOINT_ANGLES = (
+    ("left_knee", "LEFT_HIP", "LEFT_KNEE", "LEFT_ANKLE"),
+    ("right_knee", "RIGHT_HIP", "RIGHT_KNEE", "RIGHT_ANKLE"),
+    ("left_elbow", "LEFT_SHOULDER", "LEFT_ELBOW", "LEFT_WRIST"),
+    ("right_elbow", "RIGHT_SHOULDER", "RIGHT_ELBOW", "RIGHT_WRIST"),
+    ("head", "LEFT_EAR", "NOSE", "RIGHT_EAR"),
+)
+DISTANCES = (
+    ("left_hand_right_foot", "LEFT_INDEX", "RIGHT_ANKLE"),
+    ("right_hand_left_foot", "RIGHT_INDEX", "LEFT_ANKLE"),
+)
+
+ANGLE_INDEX = {name: index for index, (name, *_) in enumerate(JOINT_ANGLES)}
+DISTANCE_INDEX = {name: index for index, (name, *_) in enumerate(DISTANCES)}
+ANGLE_TRIPLETS = np.array(
+    [[LANDMARK_INDEX[joint] for joint in joints] for _, *joints in JOINT_ANGLES],
+    dtype=np.intp,
+)
+DISTANCE_PAIRS = np.array(
+    [[LANDMARK_INDEX[joint] for joint in joints] for _, *joints in DISTANCES],
+    dtype=np.intp,
+)
+
+
+def calculate_angle(a, b, c):
+    a = np.array(a)
+    b = np.array(b)
+    c = np.array(c)
+    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(
+        a[1] - b[1], a[0] - b[0]
+    )
+    angle = np.abs(radians * 180.0 / np.pi)
+    if angle > 180.0:
+        angle = 360 - angle
+    return angle
+
+
+def landmarks_to_array(pose_landmarks, out=None):
+    if out is None:
+        out = np.empty((NUM_LANDMARKS, 4), dtype=np.float32)
+    if isinstance(pose_landmarks, np.ndarray):
+        out[:] = pose_landmarks
+        return out
+    out[:] = [
+        (landmark.x, landmark.y, landmark.z, landmark.visibility)
+        for landmark in pose_landmarks.landmark
+    ]
+    return out
+
+
+def _positions(points):
+    if points.dtype != np.float32 or not points.flags.c_contiguous:
+        points = np.ascontiguousarray(points, dtype=np.float32)
+    # x + iy for every landmark, as a zero-copy view over the (..., 33, 4) array.
+    return points.view(np.complex64)[..., 0]
+
+
+def joint_angles(points, triplets=ANGLE_TRIPLETS, out=None):
+    positions = _positions(points)
+    vertex = positions[..., triplets[:, 1]]
+    first = positions[..., triplets[:, 0]] - vertex
+    second = positions[..., triplets[:, 2]] - vertex
+    turn = second * first.conj()
+    angles = np.abs(np.arctan2(turn.imag, turn.real, out=out), out=out)
+    return np.multiply(angles, 180.0 / np.pi, out=angles)
+
+
+def landmark_distances(points, pairs=DISTANCE_PAIRS, out=None):
+    positions = _positions(points)
+    return np.abs(positions[..., pairs[:, 0]] - positions[..., pairs[:, 1]], out=out)
+
+
+class PoseFrame:
+    def __init__(self):
+        self.points = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+        self.angles = np.zeros(len(JOINT_ANGLES), dtype=np.float32)
+        self.distances = np.zeros(len(DISTANCES), dtype=np.float32)
+        self.detected = False
+        self.timestamp = 0.0
+
+    def update(self, pose_landmarks, timestamp=None):
+        self.timestamp = time.perf_counter() if timestamp is None else timestamp
+        if pose_landmarks is None:
+            self.detected = False
+            return False
+        landmarks_to_array(pose_landmarks, out=self.points)
+        self.compute()
+        return True
+
+    def compute(self):
+        joint_angles(self.points, out=self.angles)
+        landmark_distances(self.points, out=self.distances)
+        self.detected = True
+
+
+def iter_pose_frames(points, timestamps=None, fps=30.0):
+    if timestamps is None:
+        timestamps = np.arange(len(points)) / fps
+    angles = joint_angles(points)
+    distances = landmark_distances(points)
+    detected = ~np.isnan(points[:, 0, 0])
+
+    pose_frame = PoseFrame()
+    for index in range(len(points)):
+        pose_frame.points = points[index]
+        pose_frame.angles = angles[index]
+        pose_frame.distances = distances[index]
+        pose_frame.detected = detected[index]
+        pose_frame.timestamp = timestamps[index]
+        yield pose_frame
@@ -1,617 +1,289 @@
-import cv2
-import mediapipe as mp
-import numpy as np
+import argparse
+import functools
 import os
-from datetime import datetime
-import firebase_admin
-from firebase_admin import credentials, firestore
-from datetime import datetime
 import time
+from contextlib import nullcontext
+from datetime import datetime
 
-
-cred = credentials.Certificate("serviceAccountKey.json")
-firebase_admin.initialize_app(cred)
-db = firestore.client()
-
-
-mp_drawing = mp.solutions.drawing_utils
-mp_pose = mp.solutions.pose
-
-
-def write_count_to_firestore(user_id, exercise_counts):
-    doc_ref = (
-        db.collection("users")
-        .document(user_id)
-        .collection("daily_records")
-        .document(datetime.now().strftime("%Y-%m-%d"))
-        .collection("time_records")
-        .document(datetime.now().strftime("%H:%M:%S"))
-    )
-    doc_ref.set(exercise_counts, merge=True)
-
-
-def start_break():
-    img_path = r"C:\Users\HP\Documents\Python Scripts\images\rest image.jpg"
-    img = cv2.imread(img_path)
-
-    if img is None:
-        print("Image not found at the specified path.")
-        return
-
-    img = cv2.resize(img, (800, 600))
-
-    window_name = "Break Time"
-    cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
-    cv2.resizeWindow(window_name, 800, 600)
-
-    for i in range(10, -1, -1):
-        img_copy = img.copy()
-
-        text = f"Break Time: {i} seconds left"
-
-        height, width, _ = img.shape
-
-        font_scale = 1.5
-        font_thickness = 2
-        font = cv2.FONT_HERSHEY_SIMPLEX
-        text_size = cv2.getTextSize(text, font, font_scale, font_thickness)[0]
-        text_x = (width - text_size[0]) // 2
-        text_y = (height + text_size[1]) // 2
-
-        cv2.putText(
-            img_copy,
-            text,
-            (text_x, text_y),
-            font,
-            font_scale,
-            (0, 0, 0),
-            font_thickness + 2,
-            cv2.LINE_AA,
-        )
-        cv2.putText(
-            img_copy,
-            text,
-            (text_x, text_y),
-            font,
-            font_scale,
-            (255, 255, 255),
-            font_thickness,
-            cv2.LINE_AA,
-        )
-
-        cv2.imshow(window_name, img_copy)
-
-        cv2.waitKey(1000)
-
-    cv2.destroyAllWindows()
-
-
-def calculate_angle(a, b, c):
-    a = np.array(a)
-    b = np.array(b)
-    c = np.array(c)
-    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(
-        a[1] - b[1], a[0] - b[0]
-    )
-    angle = np.abs(radians * 180.0 / np.pi)
-    if angle > 180.0:
-        angle = 360 - angle
-    return angle
+from adaptive import add_scheduler_arguments, scheduler_from_args
+from breaks import BREAK_IMAGE, BreakScheduler
+from broadcast import add_broadcast_arguments, publisher_from_args
+from counters import (
+    AlternateToeTouchCounter,
+    HeadRotationCounter,
+    JumpingJackCounter,
+    PushupCounter,
+    SquatCounter,
+)
+from engine import add_pose_arguments, pose_from_args, run_exercise, video_clock
+from motion import add_gate_arguments, gate_from_args
+from pipeline import run_pipelined
+from profiling import add_profiler_arguments, profiler_from_args
+from reps import RepEvents, RepMetrics
+from results import FanoutBackend, FirestoreBackend, JsonlBackend, ResultWriter
+from roi import add_region_arguments, region_from_args
+from session import Session
+from traces import TraceRecorder
+from workouts import WorkoutStore
 
 
 def detect_squats(cap):
-    count = 0
-    stage = None
-    consecutive_frames = 0
-
-    cv2.namedWindow("Squat Detection", cv2.WINDOW_NORMAL)
-    cv2.resizeWindow("Squat Detection", 800, 600)
-
     try:
-        with mp_pose.Pose(
-            min_detection_confidence=0.5, min_tracking_confidence=0.5
-        ) as pose:
-            while count < 10:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                image.flags.writeable = False
-                results = pose.process(image)
-                image.flags.writeable = True
-                image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-
-                try:
-                    landmarks = results.pose_landmarks.landmark
-                    left_hip = [
-                        landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].x,
-                        landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].y,
-                    ]
-                    left_knee = [
-                        landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].x,
-                        landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value].y,
-                    ]
-                    left_ankle = [
-                        landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].x,
-                        landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].y,
-                    ]
-                    right_hip = [
-                        landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].x,
-                        landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].y,
-                    ]
-                    right_knee = [
-                        landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value].x,
-                        landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value].y,
-                    ]
-                    right_ankle = [
-                        landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value].x,
-                        landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value].y,
-                    ]
-
-                    left_knee_angle = calculate_angle(left_hip, left_knee, left_ankle)
-                    right_knee_angle = calculate_angle(
-                        right_hip, right_knee, right_ankle
-                    )
-
-                    if left_knee_angle > 160 and right_knee_angle > 160:
-                        stage = "up"
-                    if (
-                        left_knee_angle < 135
-                        and right_knee_angle < 135
-                        and stage == "up"
-                    ):
-                        consecutive_frames += 1
-                        if consecutive_frames > 5:
-                            stage = "down"
-                            count += 1
-                            print(f"Squats: {count}")
-                            consecutive_frames = 0
-                    else:
-                        consecutive_frames = 0
-
-                except Exception as e:
-                    pass
-
-                cv2.putText(
-                    image,
-                    f"Squats: {count}",
-                    (10, 50),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    1,
-                    (0, 255, 0),
-                    2,
-                    cv2.LINE_AA,
-                )
-                mp_drawing.draw_landmarks(
-                    image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS
-                )
-                cv2.imshow("Squat Detection", image)
-
-                if cv2.waitKey(10) & 0xFF == ord("q"):
-                    break
-
-    except KeyboardInterrupt:
-        print("Squat detection stopped by user.")
-
+        return run_exercise(cap, SquatCounter())
     finally:
         cap.release()
-        cv2.destroyAllWindows()
-        return count
 
 
 def detect_pushups(cap):
-    count = 0
-    stage = None
-    consecutive_frames = 0
-
     try:
-        with mp_pose.Pose(
-            min_detection_confidence=0.5, min_tracking_confidence=0.5
-        ) as pose:
-            cv2.namedWindow("Push-up Detection", cv2.WINDOW_NORMAL)
-            cv2.resizeWindow("Push-up Detection", 800, 600)
-            while count < 10:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                image.flags.writeable = False
-                results = pose.process(image)
-                image.flags.writeable = True
-                image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-
-                try:
-                    landmarks = results.pose_landmarks.landmark
-                    left_shoulder = [
-                        landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].x,
-                        landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].y,
-                    ]
-                    right_shoulder = [
-                        landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].x,
-                        landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].y,
-                    ]
-                    left_elbow = [
-                        landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].x,
-                        landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value].y,
-                    ]
-                    right_elbow = [
-                        landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value].x,
-                        landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value].y,
-                    ]
-                    left_wrist = [
-                        landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].x,
-                        landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value].y,
-                    ]
-                    right_wrist = [
-                        landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value].x,
-                        landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value].y,
-                    ]
-
-                    left_elbow_angle = calculate_angle(
-                        left_shoulder, left_elbow, left_wrist
-                    )
-                    right_elbow_angle = calculate_angle(
-                        right_shoulder, right_elbow, right_wrist
-                    )
-
-                    if left_elbow_angle < 90 and right_elbow_angle < 90:
-                        stage = "down"
-                    if (
-                        left_elbow_angle > 160
-                        and right_elbow_angle > 160
-                        and stage == "down"
-                    ):
-                        consecutive_frames += 1
-                        if consecutive_frames > 5:
-                            stage = "up"
-                            count += 1
-                            print(f"Push-ups: {count}")
-                            consecutive_frames = 0
-                    else:
-                        consecutive_frames = 0
-
-                except Exception as e:
-                    print(f"Error processing landmarks: {e}")
-                    pass
-
-                cv2.putText(
-                    image,
-                    "Push-ups: " + str(count),
-                    (10, 50),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    1,
-                    (0, 255, 0),
-                    2,
-                    cv2.LINE_AA,
-                )
-                mp_drawing.draw_landmarks(
-                    image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS
-                )
-                cv2.imshow("Push-up Detection", image)
-
-                if cv2.waitKey(1) & 0xFF == ord("q"):
-                    break
-
-    except KeyboardInterrupt:
-        print("Pushups detection stopped by user.")
-
+        return run_exercise(cap, PushupCounter())
     finally:
         cap.release()
-        cv2.destroyAllWindows()
-        return count
 
 
 def detect_head_rotation(cap):
-    count = 0
-    rotation_stage = "front"
-    rotation_angle_threshold = 80
-
     try:
-        with mp_pose.Pose(
-            min_detection_confidence=0.5, min_tracking_confidence=0.5
-        ) as pose:
-            cv2.namedWindow("Head Rotation Detection", cv2.WINDOW_NORMAL)
-            cv2.resizeWindow("Head Rotation Detection", 800, 600)
-
-            while count < 10:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                image.flags.writeable = False
-                results = pose.process(image)
-                image.flags.writeable = True
-                image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-
-                if results.pose_landmarks is not None:
-                    landmarks = results.pose_landmarks.landmark
-                    nose = [
-                        landmarks[mp_pose.PoseLandmark.NOSE.value].x,
-                        landmarks[mp_pose.PoseLandmark.NOSE.value].y,
-                    ]
-                    left_ear = [
-                        landmarks[mp_pose.PoseLandmark.LEFT_EAR.value].x,
-                        landmarks[mp_pose.PoseLandmark.LEFT_EAR.value].y,
-                    ]
-                    right_ear = [
-                        landmarks[mp_pose.PoseLandmark.RIGHT_EAR.value].x,
-                        landmarks[mp_pose.PoseLandmark.RIGHT_EAR.value].y,
-                    ]
-
-                    a = np.array(nose)
-                    b = np.array(left_ear)
-                    c = np.array(right_ear)
-                    ab = b - a
-                    ac = c - a
-                    cosine_angle = np.dot(ab, ac) / (
-                        np.linalg.norm(ab) * np.linalg.norm(ac)
-                    )
-                    angle = np.arccos(np.clip(cosine_angle, -1.0, 1.0))
-                    angle = np.degrees(angle)
-
-                    if angle < rotation_angle_threshold:
-                        if rotation_stage == "front":
-                            rotation_stage = "turned"
-                    else:
-                        if rotation_stage == "turned":
-                            count += 1
-                            rotation_stage = "front"
-
-                cv2.putText(
-                    image,
-                    f"Head Rotations: {count}",
-                    (10, 50),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    1,
-                    (0, 255, 0),
-                    2,
-                    cv2.LINE_AA,
-                )
-
-                mp_drawing.draw_landmarks(
-                    image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS
-                )
-                cv2.imshow("Head Rotation Detection", image)
-
-                if cv2.waitKey(10) & 0xFF == ord("q"):
-                    break
-
-    except KeyboardInterrupt:
-        print("Head rotation detection stopped by user.")
-
+        return run_exercise(cap, HeadRotationCounter())
     finally:
         cap.release()
-        cv2.destroyAllWindows()
-        return count
 
 
 def detect_jumps(cap):
-
-    jumping_jack_count = 0
-    in_jumping_jack = False
-    hand_threshold = 0.2
     try:
-        with mp_pose.Pose(
-            min_detection_confidence=0.5, min_tracking_confidence=0.5
-        ) as pose:
-            cv2.namedWindow("Jump Counter", cv2.WINDOW_NORMAL)
-            cv2.resizeWindow("Jump Counter", 800, 600)
-            while cap.isOpened() and jumping_jack_count < 10:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                image.flags.writeable = False
-                results = pose.process(image)
-                image.flags.writeable = True
-                image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-
-                if results.pose_landmarks is not None:
-                    landmarks = results.pose_landmarks.landmark
-
-                    try:
-                        left_wrist_y = landmarks[mp_pose.PoseLandmark.LEFT_WRIST].y
-                        right_wrist_y = landmarks[mp_pose.PoseLandmark.RIGHT_WRIST].y
-                        head_y = landmarks[mp_pose.PoseLandmark.NOSE].y
-                        if left_wrist_y < head_y and right_wrist_y < head_y:
-                            if not in_jumping_jack:
-                                in_jumping_jack = True
-                                jumping_jack_count += 1
-                        else:
-                            in_jumping_jack = False
-
-                    except AttributeError:
-                        pass
-
-                    cv2.putText(
-                        image,
-                        f"Jumping Jacks: {jumping_jack_count}",
-                        (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        1,
-                        (0, 255, 0),
-                        2,
-                        cv2.LINE_AA,
-                    )
-
-                mp_drawing.draw_landmarks(
-                    image,
-                    results.pose_landmarks,
-                    mp_pose.POSE_CONNECTIONS,
-                    mp_drawing.DrawingSpec(
-                        color=(245, 117, 66), thickness=2, circle_radius=2
-                    ),
-                    mp_drawing.DrawingSpec(
-                        color=(245, 66, 230), thickness=2, circle_radius=2
-                    ),
-                )
-
-                cv2.imshow("Jump Counter", image)
-
-                if cv2.waitKey(10) & 0xFF == ord("q"):
-                    break
-
-    except KeyboardInterrupt:
-        print("Jumping Jacks detection stopped by user.")
-
+        return run_exercise(cap, JumpingJackCounter())
     finally:
         cap.release()
-        cv2.destroyAllWindows()
-        return jumping_jack_count
 
 
 def detect_alternate_toe_touch(cap):
-
-    count = 0
-    stage = None
-
     try:
-        with mp_pose.Pose(
-            min_detection_confidence=0.5, min_tracking_confidence=0.5
-        ) as pose:
-            cv2.namedWindow("Toe Touch Detection", cv2.WINDOW_NORMAL)
-            cv2.resizeWindow("Toe Touch Detection", 800, 600)
-            while count < 10:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                image.flags.writeable = False
-                results = pose.process(image)
-                image.flags.writeable = True
-                image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-
-                try:
-                    landmarks = results.pose_landmarks.landmark
-                    left_hand = [
-                        landmarks[mp_pose.PoseLandmark.LEFT_INDEX.value].x,
-                        landmarks[mp_pose.PoseLandmark.LEFT_INDEX.value].y,
-                    ]
-                    right_foot = [
-                        landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value].x,
-                        landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value].y,
-                    ]
-                    right_hand = [
-                        landmarks[mp_pose.PoseLandmark.RIGHT_INDEX.value].x,
-                        landmarks[mp_pose.PoseLandmark.RIGHT_INDEX.value].y,
-                    ]
-                    left_foot = [
-                        landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].x,
-                        landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value].y,
-                    ]
-
-                    distance_left_hand_right_foot = np.linalg.norm(
-                        np.array(left_hand) - np.array(right_foot)
-                    )
-                    distance_right_hand_left_foot = np.linalg.norm(
-                        np.array(right_hand) - np.array(left_foot)
-                    )
-
-                    if distance_left_hand_right_foot < 0.1:
-                        if stage != "left_hand_right_foot":
-                            count += 1
-
-                            stage = "left_hand_right_foot"
-
-                    if distance_right_hand_left_foot < 0.1:
-                        if stage != "right_hand_left_foot":
-                            count += 1
-                            stage = "right_hand_left_foot"
-
-                except Exception as e:
-                    pass
-
-                cv2.putText(
-                    image,
-                    f"Toe Touches: {count}",
-                    (10, 50),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    1,
-                    (0, 255, 0),
-                    2,
-                    cv2.LINE_AA,
-                )
-                mp_drawing.draw_landmarks(
-                    image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS
-                )
-
-                cv2.imshow("Toe Touch Detection", image)
-
-                if cv2.waitKey(10) & 0xFF == ord("q"):
-                    break
-
-    except KeyboardInterrupt:
-        print("Toe Touch detection stopped by user.")
-
+        return run_exercise(cap, AlternateToeTouchCounter())
     finally:
         cap.release()
-        cv2.destroyAllWindows()
-        return count
 
 
-def main():
+def wall_clock_offset(clock=time.perf_counter):
+    # Counters run on `clock`, the store keeps wall-clock time.
+    return time.time() - clock()
 
-    exercise_data = {}
 
-    try:
-        while True:
-            print("Choose an exercise to detect:")
-            print("1. Squats")
-            print("2. Push-ups")
-            print("3. Head Rotation")
-            print("4. Jumping Jacks")
-            print("5. Alternate Toe Touch")
-            print("6. Exit")
-
-            choice = input("Enter your choice (1-6): ")
-
-            if choice == "1":
-                cap = cv2.VideoCapture(0)
-                exercise_data["squats"] = detect_squats(cap)
-                print("Exercise completed. Starting break...")
-                start_break()
-                print("Break over. Let's get back to exercising!")
-
-            elif choice == "2":
-                cap = cv2.VideoCapture(0)
-                exercise_data["pushups"] = detect_pushups(cap)
-                print("Exercise completed. Starting break...")
-                start_break()
-                print("Break over. Let's get back to exercising!")
+def describe_reps(metrics):
+    summary = metrics.summary()
+    if not summary["reps"]:
+        return "No complete reps."
+    return (
+        f"{summary['reps']} reps at {summary['cadence']}/min, "
+        f"{summary['duration_mean']:.2f} s each "
+        f"({summary['duration_min']:.2f}-{summary['duration_max']:.2f} s), "
+        f"range {summary['range_mean']:.3g} "
+        f"({summary['range_min']:.3g}-{summary['range_max']:.3g})"
+    )
 
-            elif choice == "3":
-                cap = cv2.VideoCapture(0)
-                exercise_data["head_rotation"] = detect_head_rotation(cap)
-                print("Exercise completed. Starting break...")
-                start_break()
-                print("Break over. Let's get back to exercising!")
 
-            elif choice == "4":
-                cap = cv2.VideoCapture(0)
-                exercise_data["jumping jacks"] = detect_jumps(cap)
-                print("Exercise completed. Starting break...")
-                start_break()
-                print("Break over. Let's get back to exercising!")
+def save_trace(recorder, directory):
+    os.makedirs(directory, exist_ok=True)
+    name = recorder.exercise.replace(" ", "_")
+    path = os.path.join(
+        directory, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.npz"
+    )
+    recorder.save(path)
+    print(f"Landmark trace saved to {path}")
+
+
+MENU = [
+    ("1", "Squats", SquatCounter),
+    ("2", "Push-ups", PushupCounter),
+    ("3", "Head Rotation", HeadRotationCounter),
+    ("4", "Jumping Jacks", JumpingJackCounter),
+    ("5", "Alternate Toe Touch", AlternateToeTouchCounter),
+]
+
+
+def choose_exercise(counters):
+    while True:
+        print("Choose an exercise to detect:")
+        for choice, name, _ in MENU:
+            print(f"{choice}. {name}")
+        print("6. Exit")
+
+        choice = input("Enter your choice (1-6): ")
+        if choice in counters or choice == "6":
+            return choice
+        print("Invalid choice, please try again.")
+
+
+def results_backend(args, store):
+    # The JSONL file goes last, as it is the one backend that would repeat
+    # records when a batch is retried.
+    backends = [store]
+    if args.firestore:
+        backends.append(FirestoreBackend(args.credentials))
+    if args.local_results:
+        backends.append(JsonlBackend(args.local_results))
+    return FanoutBackend(backends)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Detect and count exercises from the webcam."
+    )
+    parser.add_argument(
+        "--camera",
+        default="0",
+        help="camera index or video file to read frames from",
+    )
+    parser.add_argument(
+        "--pipelined",
+        action="store_true",
+        help="run capture, inference and rendering on separate threads",
+    )
+    parser.add_argument(
+        "--no-window",
+        dest="show",
+        action="store_false",
+        help="count without opening any windows; breaks are shown in the terminal",
+    )
+    parser.add_argument(
+        "--break-seconds",
+        type=int,
+        default=10,
+        help="length of the break between exercises",
+    )
+    parser.add_argument(
+        "--break-image",
+        default=BREAK_IMAGE,
+        help="image shown behind the break countdown",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="DIR",
+        help="save a landmark trace of every exercise into DIR",
+    )
+    parser.add_argument(
+        "--user", default="Sabareesh M", help="user the exercise counts belong to"
+    )
+    parser.add_argument(
+        "--store",
+        default="workouts.db",
+        help="local SQLite store every set and rep is saved to",
+    )
+    parser.add_argument(
+        "--firestore",
+        action="store_true",
+        help="also sync results to Firebase Firestore",
+    )
+    parser.add_argument(
+        "--local-results",
+        metavar="PATH",
+        help="also append results to this JSONL file",
+    )
+    parser.add_argument(
+        "--credentials",
+        default="serviceAccountKey.json",
+        help="Firebase service account key, loaded when the first result is saved",
+    )
+    parser.add_argument(
+        "--journal",
+        default="pending_results.jsonl",
+        help="local journal of results that have not been saved yet",
+    )
+    add_pose_arguments(parser)
+    add_region_arguments(parser)
+    add_scheduler_arguments(parser)
+    add_gate_arguments(parser)
+    add_broadcast_arguments(parser)
+    add_profiler_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.pipelined and args.target_fps:
+        parser.error("--target-fps is not supported together with --pipelined")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    run = run_pipelined if args.pipelined else run_exercise
+    counters = {choice: counter for choice, _, counter in MENU}
+
+    profiler = profiler_from_args(args)
+    reported = False
+
+    camera = int(args.camera) if args.camera.isdigit() else args.camera
+    publisher = publisher_from_args(args)
+    with RepEvents() as events, WorkoutStore(args.store) as store, ResultWriter(
+        results_backend(args, store), args.journal
+    ) as writer, Session(
+        camera, open_model=functools.partial(pose_from_args, args)
+    ) as session, nullcontext() if publisher is None else publisher:
+        if publisher is not None:
+            print(f"Streaming landmarks on ws://{publisher.host}:{publisher.port}")
+            events.subscribe(publisher.rep)
+        breaks = BreakScheduler(
+            session, args.break_seconds, args.show, args.break_image
+        )
+        # Rep times for the store are collected here and taken after each set.
+        stored = events.subscribe(maxsize=None)
+        choice = choose_exercise(counters)
+        while choice != "6":
+            counter = counters[choice](events)
+            metrics = RepMetrics()
+            measured = events.subscribe(metrics.update)
+            recorder = TraceRecorder(counter.key) if args.record else None
+            options = dict(
+                show=args.show,
+                recorder=recorder,
+                region=region_from_args(args),
+                profiler=profiler,
+                on_first_frame=breaks.first_frame,
+                gate=gate_from_args(args),
+                publisher=publisher,
+            )
+            if not args.pipelined:
+                options["scheduler"] = scheduler_from_args(args)
+
+            if publisher is not None:
+                publisher.start_set(counter)
+            cap, pose = session.acquire()
+            if not reported:
+                print(f"Session ready: {session.summary()}")
+                reported = True
+            # Video files decode faster than real time, so they are counted on
+            # their own timestamps like in batch.py.
+            clock = time.perf_counter if isinstance(camera, int) else video_clock(cap)
+            offset = wall_clock_offset(clock)
+            count = run(cap, counter, pose=pose, clock=clock, **options)
+            reps = [event.end + offset for event in stored.drain()]
+            writer.submit(args.user, counter.key, count, reps)
+            events.unsubscribe(measured)
+            print(f"{counter.label}: {describe_reps(metrics)}")
+            if options["gate"] is not None:
+                print(options["gate"].summary())
+            if recorder is not None:
+                save_trace(recorder, args.record)
+            if breaks.resume_times and breaks.ended_at is None:
+                print(
+                    f"First frame counted {breaks.resume_times[-1] * 1000:.0f} ms "
+                    "after the break."
+                )
 
-            elif choice == "5":
-                cap = cv2.VideoCapture(0)
-                exercise_data["alternate_toe_touches"] = detect_alternate_toe_touch(cap)
-                print("Exercise completed. Starting break...")
-                start_break()
+            # The next exercise is picked before the break, so it starts as
+            # soon as the break is over.
+            print("Exercise completed.")
+            choice = choose_exercise(counters)
+            if choice != "6":
+                print("Starting break...")
+                breaks.take_break()
                 print("Break over. Let's get back to exercising!")
 
-            elif choice == "6":
-                break
-
-            else:
-                print("Invalid choice, please try again.")
-
-    finally:
-        write_count_to_firestore("Sabareesh M", exercise_data)
+        if publisher is not None:
+            print(publisher.summary())
+        if profiler.enabled:
+            profiler.report()
+            if args.timings_json:
+                profiler.export(
+                    args.timings_json,
+                    session=session.timings,
+                    breaks=breaks.summary(),
+                )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+import cv2
+import numpy as np
+
+from buffers import FrameBuffers
+from engine import VISIBILITY_THRESHOLD
+
+
+class MotionGate:
+    # Decides before pose inference whether a frame is worth it. A small
+    # grayscale copy of every frame is compared with the one from the last
+    # inference, only inside the last pose's box while someone is in view.
+    # Nothing changed means the landmarks would not change either, so such
+    # frames are skipped. Inference still runs every still_interval seconds
+    # while a person is in view, and every idle_interval seconds while nobody
+    # is. The first changed frame brings back the full rate.
+    def __init__(
+        self,
+        width=96,
+        threshold=15,
+        min_motion=0.01,
+        still_interval=0.25,
+        idle_interval=1.0,
+        padding=0.1,
+    ):
+        self.width = width
+        self.threshold = threshold
+        self.min_motion = min_motion
+        self.still_interval = still_interval
+        self.idle_interval = idle_interval
+        self.padding = padding
+        self.buffers = FrameBuffers()
+        self.reference = None
+        self.box = None
+        self.inferred_at = None
+        self.frames = 0
+        self.inferred = 0
+
+    def _gray(self, frame):
+        height, width = frame.shape[:2]
+        size = (self.width, max(1, round(height * self.width / width)))
+        # Sampling every few pixels first and averaging 2x2 of those smooths
+        # sensor noise at a fraction of the cost of averaging the full frame.
+        sampled = cv2.resize(
+            frame,
+            (size[0] * 2, size[1] * 2),
+            dst=self.buffers.get("sampled", (size[1] * 2, size[0] * 2, 3)),
+            interpolation=cv2.INTER_NEAREST,
+        )
+        small = cv2.resize(
+            sampled,
+            size,
+            dst=self.buffers.get("small", (size[1], size[0], 3)),
+            interpolation=cv2.INTER_AREA,
+        )
+        return cv2.cvtColor(
+            small, cv2.COLOR_BGR2GRAY, dst=self.buffers.get("gray", small.shape[:2])
+        )
+
+    def _changed(self, gray):
+        if self.reference is None or self.reference.shape != gray.shape:
+            return True
+        diff = cv2.absdiff(
+            gray, self.reference, dst=self.buffers.get("diff", gray.shape)
+        )
+        if self.box is not None:
+            left, top, right, bottom = self.box
+            diff = diff[top:bottom, left:right]
+        return np.count_nonzero(diff > self.threshold) > self.min_motion * diff.size
+
+    def should_infer(self, frame, timestamp):
+        self.frames += 1
+        gray = self._gray(frame)
+        interval = self.idle_interval if self.box is None else self.still_interval
+        if (
+            self.inferred_at is not None
+            and timestamp - self.inferred_at < interval
+            and not self._changed(gray)
+        ):
+            return False
+        self.reference = self.buffers.get("reference", gray.shape)
+        np.copyto(self.reference, gray)
+        self.inferred_at = timestamp
+        self.inferred += 1
+        return True
+
+    def record(self, pose_frame):
+        if not pose_frame.detected or self.reference is None:
+            self.box = None
+            return
+        points = pose_frame.points
+        visible = points[points[:, 3] > VISIBILITY_THRESHOLD, :2]
+        if not len(visible):
+            visible = points[:, :2]
+        low = visible.min(axis=0) - self.padding
+        high = visible.max(axis=0) + self.padding
+        height, width = self.reference.shape
+        left, top = np.clip(np.floor(low * (width, height)), 0, (width, height))
+        right, bottom = np.clip(np.ceil(high * (width, height)), 0, (width, height))
+        if right - left < 1 or bottom - top < 1:
+            self.box = None
+            return
+        self.box = int(left), int(top), int(right), int(bottom)
+
+    def summary(self):
+        share = self.inferred / self.frames if self.frames else 1.0
+        return (
+            f"motion gate: inferred {self.inferred}/{self.frames} frames ({share:.0%})"
+        )
+
+
+def add_gate_arguments(parser):
+    parser.add_argument(
+        "--motion-gate",
+        action="store_true",
+        help="skip pose inference on frames where nothing moved since the last one",
+    )
+
+
+def gate_from_args(args):
+    return MotionGate() if args.motion_gate else None
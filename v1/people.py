@@ -0,0 +1,311 @@
+import argparse
+import functools
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from buffers import FrameBuffers
+from counters import COUNTERS
+from engine import (
+    add_pose_arguments,
+    draw_pose,
+    infer,
+    pose_from_args,
+    update_counter,
+    video_clock,
+)
+from landmarks import PoseFrame
+from roi import RoiTracker
+
+
+class PersonDetector:
+    def __init__(self, width=640, min_score=0.3, overlap=0.45):
+        self.width = width
+        self.min_score = min_score
+        self.overlap = overlap
+        self.hog = cv2.HOGDescriptor()
+        self.hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+
+    def detect(self, frame):
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.width / width)
+        image = frame
+        if scale < 1.0:
+            image = cv2.resize(
+                frame, (self.width, round(height * scale)), interpolation=cv2.INTER_AREA
+            )
+        rects, weights = self.hog.detectMultiScale(
+            image, winStride=(8, 8), padding=(8, 8), scale=1.05
+        )
+        if len(rects) == 0:
+            return np.empty((0, 4), dtype=np.float32)
+
+        scores = np.ravel(weights).astype(float)
+        keep = cv2.dnn.NMSBoxes(
+            [list(map(int, rect)) for rect in rects],
+            scores.tolist(),
+            self.min_score,
+            self.overlap,
+        )
+        rects = np.asarray(rects, dtype=np.float32)[np.ravel(keep).astype(int)]
+        rects[:, 2:] += rects[:, :2]
+        return rects / (image.shape[1], image.shape[0], image.shape[1], image.shape[0])
+
+
+def box_iou(a, b):
+    # Pairwise IoU of (n, 4) and (m, 4) normalized x0, y0, x1, y1 boxes.
+    low = np.maximum(a[:, None, :2], b[None, :, :2])
+    high = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    overlap = np.prod(np.clip(high - low, 0.0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return overlap / (area_a[:, None] + area_b[None, :] - overlap + 1e-9)
+
+
+def match_boxes(a, b, threshold):
+    # Greedy matching on IoU, best pairs first; returns (i, j) index pairs.
+    if len(a) == 0 or len(b) == 0:
+        return []
+    iou = box_iou(a, b)
+    pairs = []
+    used_a, used_b = set(), set()
+    for flat in np.argsort(iou, axis=None)[::-1]:
+        i, j = divmod(int(flat), len(b))
+        if iou[i, j] < threshold:
+            break
+        if i not in used_a and j not in used_b:
+            used_a.add(i)
+            used_b.add(j)
+            pairs.append((i, j))
+    return pairs
+
+
+class Track:
+    def __init__(self, track_id, counter, pose, box, padding=0.15, min_size=0.1):
+        self.id = track_id
+        self.counter = counter
+        self.pose = pose
+        self.pose_frame = PoseFrame()
+        self.buffers = FrameBuffers()
+        self.region = RoiTracker(padding=padding, min_size=min_size)
+        self.region.box = box
+        self.box = box
+        self.misses = 0
+
+    def infer(self, frame, timestamp):
+        # A track that lost its person waits for the detector instead of
+        # searching the whole frame, where it would find somebody else.
+        if self.region.box is None:
+            self.pose_frame.detected = False
+            return False
+        infer(
+            self.pose,
+            frame,
+            self.pose_frame,
+            self.region,
+            timestamp=timestamp,
+            buffers=self.buffers,
+        )
+        if self.region.box is not None:
+            self.box = self.region.box
+        return self.pose_frame.detected
+
+
+class PersonTracker:
+    def __init__(
+        self,
+        exercise,
+        open_model,
+        detector=None,
+        detect_every=15,
+        max_people=8,
+        max_misses=30,
+        iou_threshold=0.3,
+        workers=None,
+    ):
+        self.exercise = exercise
+        self.open_model = open_model
+        self.detector = detector or PersonDetector()
+        self.detect_every = detect_every
+        self.max_people = max_people
+        self.max_misses = max_misses
+        self.iou_threshold = iou_threshold
+        self.tracks = []
+        self.finished = []
+        self._ids = itertools.count(1)
+        self._models = []
+        self._frames = 0
+        self._executor = ThreadPoolExecutor(workers or min(max_people, os.cpu_count()))
+
+    def _new_track(self, box):
+        pose = self._models.pop() if self._models else self.open_model()
+        return Track(next(self._ids), COUNTERS[self.exercise](), pose, box)
+
+    def _drop(self, track):
+        self.tracks.remove(track)
+        self.finished.append(track)
+        track.pose.reset()
+        self._models.append(track.pose)
+
+    def _detect(self, frame):
+        detections = self.detector.detect(frame)
+        boxes = np.array([track.box for track in self.tracks]).reshape(-1, 4)
+        matched = set()
+        for i, j in match_boxes(boxes, detections, self.iou_threshold):
+            track = self.tracks[i]
+            matched.add(j)
+            if track.region.box is None:
+                track.region.box = track.box = detections[j]
+        for j, box in enumerate(detections):
+            if j not in matched and len(self.tracks) < self.max_people:
+                self.tracks.append(self._new_track(box))
+
+    def update(self, frame, timestamp=None):
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        if self._frames % self.detect_every == 0 or not self.tracks:
+            self._detect(frame)
+        self._frames += 1
+
+        found = list(
+            self._executor.map(lambda track: track.infer(frame, timestamp), self.tracks)
+        )
+        for track, detected in zip(list(self.tracks), found):
+            if detected:
+                track.misses = 0
+                update_counter(track.counter, track.pose_frame, verbose=False)
+            else:
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    self._drop(track)
+
+        # Two tracks that converged on the same person: keep the older one.
+        live = [track for track in self.tracks if track.region.box is not None]
+        boxes = np.array([track.box for track in live]).reshape(-1, 4)
+        overlap = np.triu(box_iou(boxes, boxes), k=1)
+        for _, j in zip(*np.nonzero(overlap > 0.7)):
+            if live[j] in self.tracks:
+                self._drop(live[j])
+        return self.tracks
+
+    def counts(self):
+        # Short-lived tracks are usually detector false positives.
+        tracks = [track for track in self.finished if track.counter.count]
+        return {track.id: track.counter.count for track in tracks + self.tracks}
+
+    def close(self):
+        self._executor.shutdown()
+        for track in self.tracks:
+            track.pose.close()
+        for pose in self._models:
+            pose.close()
+
+
+def draw_tracks(image, tracks, counter_cls):
+    height, width = image.shape[:2]
+    for track in tracks:
+        if track.pose_frame.detected:
+            draw_pose(image, track.pose_frame.points, counter_cls.drawing_colors)
+        x0, y0 = (track.box[:2] * (width, height)).astype(int)
+        cv2.putText(
+            image,
+            f"#{track.id} {counter_cls.label}: {track.counter.count}",
+            (x0, max(20, y0 - 10)),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.7,
+            (0, 255, 0),
+            2,
+            cv2.LINE_AA,
+        )
+
+
+def run_group(cap, tracker, show=True, clock=time.perf_counter):
+    counter_cls = COUNTERS[tracker.exercise]
+    if show:
+        cv2.namedWindow(counter_cls.window_name, cv2.WINDOW_NORMAL)
+        cv2.resizeWindow(counter_cls.window_name, 800, 600)
+
+    frames = 0
+    frame = None
+    started = time.perf_counter()
+    try:
+        while cap.isOpened():
+            ret, frame = cap.read(frame)
+            if not ret:
+                break
+            tracks = tracker.update(frame, clock())
+            frames += 1
+            if show:
+                draw_tracks(frame, tracks, counter_cls)
+                cv2.imshow(counter_cls.window_name, frame)
+                if cv2.waitKey(1) & 0xFF == ord("q"):
+                    break
+
+    except KeyboardInterrupt:
+        print(f"{counter_cls.label} detection stopped by user.")
+
+    finally:
+        if show:
+            cv2.destroyAllWindows()
+
+    seconds = time.perf_counter() - started
+    return frames, seconds
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Count reps separately for every person in a group session."
+    )
+    parser.add_argument("exercise", choices=sorted(COUNTERS))
+    parser.add_argument(
+        "source", nargs="?", default="0", help="camera index or video file"
+    )
+    parser.add_argument("--max-people", type=int, default=8)
+    parser.add_argument(
+        "--detect-every",
+        type=int,
+        default=15,
+        metavar="N",
+        help="look for new people every N frames",
+    )
+    parser.add_argument(
+        "--no-window", dest="show", action="store_false", help="run headless"
+    )
+    parser.add_argument("-o", "--output", help="write per-person counts as JSON")
+    add_pose_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cap = cv2.VideoCapture(int(args.source) if args.source.isdigit() else args.source)
+    tracker = PersonTracker(
+        args.exercise,
+        functools.partial(pose_from_args, args),
+        detect_every=args.detect_every,
+        max_people=args.max_people,
+    )
+    try:
+        clock = video_clock(cap) if os.path.isfile(args.source) else time.perf_counter
+        frames, seconds = run_group(cap, tracker, show=args.show, clock=clock)
+    finally:
+        cap.release()
+        tracker.close()
+
+    counts = tracker.counts()
+    for track_id, count in counts.items():
+        print(f"Person #{track_id}: {count} {args.exercise}")
+    if seconds > 0:
+        print(f"{frames} frames in {seconds:.1f}s ({frames / seconds:.1f} fps)")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"exercise": args.exercise, "counts": counts}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
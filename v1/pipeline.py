@@ -0,0 +1,242 @@
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+import cv2
+
+from buffers import FrameBuffers, FramePool
+from engine import infer, open_pose, render, update_counter
+from landmarks import PoseFrame
+from profiling import NULL_PROFILER
+
+
+class LatestQueue:
+    def __init__(self, maxsize=1, on_drop=None):
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self.on_drop = on_drop
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+                if self.on_drop is not None and self._items[0] is not None:
+                    self.on_drop(self._items[0])
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout):
+                raise queue.Empty
+            return self._items.popleft()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.frames = 0
+        self.busy = 0.0
+        self.started = None
+        self.stopped = None
+
+    def record(self, started):
+        now = time.perf_counter()
+        if self.started is None:
+            self.started = started
+        self.stopped = now
+        self.busy += now - started
+        self.frames += 1
+
+    def fps(self):
+        if self.frames < 2:
+            return 0.0
+        return self.frames / (self.stopped - self.started)
+
+    def summary(self):
+        busy_ms = self.busy / self.frames * 1000 if self.frames else 0.0
+        return f"{self.name}: {self.fps():.1f} fps, {busy_ms:.1f} ms/frame"
+
+
+class PipelineStats:
+    def __init__(self):
+        self.capture = StageStats("capture")
+        self.inference = StageStats("inference")
+        self.render = StageStats("render")
+        self.latencies = deque(maxlen=1000)
+        self.dropped = {}
+
+    def summary(self):
+        lines = [stage.summary() for stage in (self.capture, self.inference, self.render)]
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            mean = sum(ordered) / len(ordered)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            lines.append(
+                f"end-to-end latency: {mean * 1000:.1f} ms mean, {p95 * 1000:.1f} ms p95"
+            )
+        for name, dropped in self.dropped.items():
+            lines.append(f"{name} queue dropped {dropped} frames")
+        return "\n".join(lines)
+
+
+def _capture_loop(cap, pool, frames, stop, stats, clock):
+    try:
+        while not stop.is_set() and cap.isOpened():
+            started = time.perf_counter()
+            ret, frame = pool.read(cap)
+            if not ret:
+                break
+            stats.capture.record(started)
+            frames.put((started, clock(), frame))
+    finally:
+        frames.put(None)
+
+
+def _inference_loop(
+    pose,
+    counter,
+    target,
+    frames,
+    outputs,
+    stop,
+    stats,
+    recorder,
+    region,
+    profiler,
+    on_first_frame,
+    gate,
+    publisher,
+):
+    pose_frame = PoseFrame()
+    buffers = FrameBuffers()
+    try:
+        with open_pose() if pose is None else nullcontext(pose) as pose:
+            while not stop.is_set():
+                item = frames.get()
+                if item is None:
+                    break
+                captured_at, timestamp, frame = item
+
+                started = time.perf_counter()
+                if gate is None or gate.should_infer(frame, timestamp):
+                    infer(pose, frame, pose_frame, region, profiler, timestamp, buffers)
+                    if gate is not None:
+                        gate.record(pose_frame)
+                    update_counter(counter, pose_frame)
+                    if on_first_frame is not None:
+                        on_first_frame(time.perf_counter())
+                        on_first_frame = None
+                    if recorder is not None:
+                        recorder.append(pose_frame, timestamp)
+                    if publisher is not None:
+                        publisher.publish_frame(pose_frame, counter.count)
+                stats.inference.record(started)
+
+                points = pose_frame.points.copy() if pose_frame.detected else None
+                outputs.put((captured_at, frame, points))
+                if target is not None and counter.count >= target:
+                    break
+    finally:
+        stop.set()
+        outputs.put(None)
+
+
+def run_pipelined(
+    cap,
+    counter,
+    target=10,
+    show=True,
+    queue_size=2,
+    pose=None,
+    stats=None,
+    recorder=None,
+    region=None,
+    profiler=NULL_PROFILER,
+    on_first_frame=None,
+    gate=None,
+    publisher=None,
+    clock=time.perf_counter,
+):
+    if stats is None:
+        stats = PipelineStats()
+    # Frames go back to the pool once rendered, or when a queue drops them.
+    pool = FramePool(queue_size + 4)
+    frames = LatestQueue(1, on_drop=lambda item: pool.release(item[2]))
+    outputs = LatestQueue(queue_size, on_drop=lambda item: pool.release(item[1]))
+    stop = threading.Event()
+
+    workers = [
+        threading.Thread(
+            target=_capture_loop,
+            args=(cap, pool, frames, stop, stats, clock),
+            daemon=True,
+        ),
+        threading.Thread(
+            target=_inference_loop,
+            args=(
+                pose,
+                counter,
+                target,
+                frames,
+                outputs,
+                stop,
+                stats,
+                recorder,
+                region,
+                profiler,
+                on_first_frame,
+                gate,
+                publisher,
+            ),
+            daemon=True,
+        ),
+    ]
+
+    if show:
+        cv2.namedWindow(counter.window_name, cv2.WINDOW_NORMAL)
+        cv2.resizeWindow(counter.window_name, 800, 600)
+
+    for worker in workers:
+        worker.start()
+
+    try:
+        while True:
+            item = outputs.get()
+            if item is None:
+                break
+            captured_at, frame, points = item
+
+            started = time.perf_counter()
+            if show:
+                render(frame, points, counter, profiler)
+                waited_at = profiler.mark()
+                key = cv2.waitKey(1)
+                profiler.record("wait_key", waited_at)
+                if key & 0xFF == ord("q"):
+                    break
+            stats.render.record(started)
+            stats.latencies.append(time.perf_counter() - captured_at)
+            pool.release(frame)
+
+    except KeyboardInterrupt:
+        print(f"{counter.label} detection stopped by user.")
+
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+        if show:
+            cv2.destroyAllWindows()
+        stats.dropped = {"capture": frames.dropped, "render": outputs.dropped}
+        print(stats.summary())
+
+    counter.finish()
+    return counter.count
@@ -0,0 +1,117 @@
+import json
+import time
+from collections import defaultdict, deque
+
+import cv2
+import numpy as np
+
+
+class StageProfiler:
+    enabled = True
+
+    def __init__(self, window=1000, overlay=False, refresh=30):
+        self.samples = defaultdict(lambda: deque(maxlen=window))
+        self.counts = defaultdict(int)
+        self.totals = defaultdict(float)
+        self.show_overlay = overlay
+        self.refresh = refresh
+        self._overlay_lines = []
+        self._overlay_age = refresh
+
+    def mark(self):
+        return time.perf_counter()
+
+    def record(self, stage, started):
+        now = time.perf_counter()
+        elapsed = now - started
+        self.samples[stage].append(elapsed)
+        self.counts[stage] += 1
+        self.totals[stage] += elapsed
+        return now
+
+    def summary(self):
+        summary = {}
+        for stage, samples in list(self.samples.items()):
+            p50, p95, p99 = np.percentile(samples, (50, 95, 99)) * 1000
+            summary[stage] = {
+                "count": self.counts[stage],
+                "mean_ms": round(self.totals[stage] / self.counts[stage] * 1000, 3),
+                "p50_ms": round(p50, 3),
+                "p95_ms": round(p95, 3),
+                "p99_ms": round(p99, 3),
+            }
+        return summary
+
+    def export(self, path, **extra):
+        with open(path, "w") as f:
+            json.dump({"stages": self.summary(), **extra}, f, indent=2)
+
+    def overlay(self, image):
+        if not self.show_overlay:
+            return
+        self._overlay_age += 1
+        if self._overlay_age >= self.refresh:
+            self._overlay_age = 0
+            self._overlay_lines = [
+                f"{stage}: {stats['p50_ms']:.1f} / {stats['p95_ms']:.1f} / "
+                f"{stats['p99_ms']:.1f} ms"
+                for stage, stats in self.summary().items()
+            ]
+        for row, line in enumerate(self._overlay_lines):
+            cv2.putText(
+                image,
+                line,
+                (10, 80 + row * 20),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.5,
+                (0, 255, 255),
+                1,
+                cv2.LINE_AA,
+            )
+
+    def report(self):
+        for stage, stats in self.summary().items():
+            print(
+                f"{stage:>10}: p50 {stats['p50_ms']:7.2f} ms  "
+                f"p95 {stats['p95_ms']:7.2f} ms  p99 {stats['p99_ms']:7.2f} ms"
+            )
+
+
+class NullProfiler:
+    enabled = False
+
+    def mark(self):
+        return 0.0
+
+    def record(self, stage, started):
+        return 0.0
+
+    def overlay(self, image):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def add_profiler_arguments(parser):
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="time every stage of the frame loop and print p50/p95/p99 at exit",
+    )
+    parser.add_argument(
+        "--timings-overlay",
+        action="store_true",
+        help="draw the stage timings on the video window (implies --timings)",
+    )
+    parser.add_argument(
+        "--timings-json",
+        metavar="PATH",
+        help="write the stage timing summary to PATH at exit (implies --timings)",
+    )
+
+
+def profiler_from_args(args):
+    if not (args.timings or args.timings_overlay or args.timings_json):
+        return NULL_PROFILER
+    return StageProfiler(overlay=args.timings_overlay)
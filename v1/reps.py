@@ -0,0 +1,163 @@
+import math
+import threading
+from collections import deque, namedtuple
+
+# One finished rep. start is when the tracked feature last left its resting
+# range, end when it came back; low and high are the feature's extremes in
+# between, including the rest position it started from.
+RepEvent = namedtuple(
+    "RepEvent",
+    "exercise phase number start end duration low high range",
+)
+
+
+class Subscription:
+    # Events wait in a bounded deque, so a slow subscriber loses its oldest
+    # events instead of holding up the counter that publishes them. With a
+    # callback they are delivered on the subscription's own thread; without
+    # one, iterate over it or drain it.
+    def __init__(self, callback=None, maxsize=256):
+        self.events = deque(maxlen=maxsize)
+        self.dropped = 0
+        self.closed = False
+        self._ready = threading.Condition()
+        self._thread = None
+        if callback is not None:
+            self._thread = threading.Thread(
+                target=self._deliver, args=(callback,), daemon=True
+            )
+            self._thread.start()
+
+    def put(self, event):
+        with self._ready:
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append(event)
+            self._ready.notify()
+
+    def get(self, timeout=None):
+        # None once the subscription is closed and empty, or on timeout.
+        with self._ready:
+            self._ready.wait_for(lambda: self.events or self.closed, timeout)
+            return self.events.popleft() if self.events else None
+
+    def drain(self):
+        with self._ready:
+            events = list(self.events)
+            self.events.clear()
+        return events
+
+    def __iter__(self):
+        while True:
+            event = self.get()
+            if event is None:
+                return
+            yield event
+
+    def _deliver(self, callback):
+        for event in self:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Rep event subscriber failed ({e})")
+
+    def close(self):
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class RepEvents:
+    def __init__(self):
+        self.subscriptions = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback=None, maxsize=256):
+        subscription = Subscription(callback, maxsize)
+        with self._lock:
+            # Replaced rather than appended to, so publish never needs the lock.
+            self.subscriptions = self.subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self.subscriptions = [
+                other for other in self.subscriptions if other is not subscription
+            ]
+        subscription.close()
+
+    def publish(self, event):
+        for subscription in self.subscriptions:
+            subscription.put(event)
+
+    def close(self):
+        for subscription in self.subscriptions:
+            self.unsubscribe(subscription)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class RunningStats:
+    # Welford's mean and variance, updated in constant time and memory.
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.low = math.inf
+        self.high = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.low = min(self.low, value)
+        self.high = max(self.high, value)
+
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class RepMetrics:
+    def __init__(self):
+        self.reps = 0
+        self.duration = RunningStats()
+        self.range = RunningStats()
+        self.first_start = None
+        self.last = None
+
+    def update(self, event):
+        self.reps += 1
+        self.duration.add(event.duration)
+        self.range.add(event.range)
+        if self.first_start is None:
+            self.first_start = event.start
+        self.last = event
+
+    def cadence(self):
+        # Reps per minute from the start of the first rep to the end of the last.
+        if self.last is None or self.last.end <= self.first_start:
+            return 0.0
+        return 60 * self.reps / (self.last.end - self.first_start)
+
+    def summary(self):
+        if not self.reps:
+            return {"reps": 0}
+        return {
+            "reps": self.reps,
+            "cadence": round(self.cadence(), 1),
+            "duration_mean": round(self.duration.mean, 3),
+            "duration_std": round(self.duration.std(), 3),
+            "duration_min": round(self.duration.low, 3),
+            "duration_max": round(self.duration.high, 3),
+            "range_mean": round(self.range.mean, 3),
+            "range_std": round(self.range.std(), 3),
+            "range_min": round(self.range.low, 3),
+            "range_max": round(self.range.high, 3),
+        }
@@ -0,0 +1,223 @@
+import json
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime
+
+
+class FirestoreBackend:
+    def __init__(self, credentials_path="serviceAccountKey.json", db=None):
+        self.credentials_path = credentials_path
+        self.db = db
+
+    def connect(self):
+        if self.db is None:
+            import firebase_admin
+            from firebase_admin import credentials, firestore
+
+            try:
+                firebase_admin.get_app()
+            except ValueError:
+                cred = credentials.Certificate(self.credentials_path)
+                firebase_admin.initialize_app(cred)
+            self.db = firestore.client()
+        return self.db
+
+    def write(self, records):
+        self.connect()
+        batch = self.db.batch()
+        for record in records:
+            timestamp = datetime.fromisoformat(record["timestamp"])
+            doc_ref = (
+                self.db.collection("users")
+                .document(record["user_id"])
+                .collection("daily_records")
+                .document(timestamp.strftime("%Y-%m-%d"))
+                .collection("time_records")
+                # The id suffix keeps two sets saved in the same second apart.
+                .document(f"{timestamp.strftime('%H:%M:%S')}-{record['id'][:8]}")
+            )
+            batch.set(doc_ref, {record["exercise"]: record["count"]}, merge=True)
+        batch.commit()
+
+
+class JsonlBackend:
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, records):
+        with open(self.path, "a") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+
+class FanoutBackend:
+    # Writes every batch to several backends in order. A failure anywhere
+    # makes ResultWriter retry the whole batch, so every backend but the last
+    # has to cope with records it already has: WorkoutStore skips them and
+    # Firestore overwrites the same documents.
+    def __init__(self, backends):
+        self.backends = backends
+
+    def connect(self):
+        for backend in self.backends:
+            if hasattr(backend, "connect"):
+                backend.connect()
+
+    def write(self, records):
+        for backend in self.backends:
+            backend.write(records)
+
+
+class MemoryBackend:
+    def __init__(self):
+        self.records = []
+
+    def write(self, records):
+        self.records.extend(records)
+
+
+class Journal:
+    def __init__(self, path):
+        self.path = path
+        self.pending = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if "ack" in entry:
+                        for record_id in entry["ack"]:
+                            self.pending.pop(record_id, None)
+                    else:
+                        self.pending[entry["id"]] = entry
+
+        self._file = open(path, "a")
+        if not self.pending:
+            self._file.truncate(0)
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def append(self, record):
+        with self._lock:
+            self._write(record)
+            self.pending[record["id"]] = record
+
+    def ack(self, record_ids):
+        with self._lock:
+            for record_id in record_ids:
+                self.pending.pop(record_id, None)
+            if self.pending:
+                self._write({"ack": list(record_ids)})
+            else:
+                self._file.truncate(0)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class ResultWriter:
+    def __init__(
+        self,
+        backend,
+        journal_path="pending_results.jsonl",
+        batch_size=20,
+        flush_interval=1.0,
+        initial_backoff=1.0,
+        max_backoff=60.0,
+    ):
+        self.backend = backend
+        self.journal = Journal(journal_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+
+        self._queue = queue.Queue()
+        for record in self.journal.pending.values():
+            self._queue.put(record)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, user_id, exercise, count, reps=()):
+        record = {
+            "id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "exercise": exercise,
+            "count": count,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "reps": [round(rep, 3) for rep in reps],
+        }
+        self.journal.append(record)
+        self._queue.put(record)
+        return record
+
+    def _next_batch(self):
+        try:
+            records = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(records) < self.batch_size:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return records
+
+    def _run(self):
+        if hasattr(self.backend, "connect"):
+            try:
+                self.backend.connect()
+            except Exception as e:
+                print(f"Could not connect to the results backend yet ({e})")
+
+        batch = []
+        backoff = self.initial_backoff
+        while True:
+            if not batch:
+                if self._stop.is_set() and self._queue.empty():
+                    return
+                batch = self._next_batch()
+                continue
+
+            try:
+                self.backend.write(batch)
+            except Exception as e:
+                print(f"Saving results failed ({e}), retrying in {backoff:.1f}s")
+                if self._stop.wait(backoff):
+                    return
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+
+            self.journal.ack([record["id"] for record in batch])
+            batch = []
+            backoff = self.initial_backoff
+
+    def close(self, timeout=10.0):
+        self._stop.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print("Results are still being saved, they will be retried next session.")
+            return
+        self.journal.close()
+        if self.journal.pending:
+            print(
+                f"{len(self.journal.pending)} results could not be saved, "
+                "they will be retried next session."
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
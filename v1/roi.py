@@ -0,0 +1,91 @@
+import cv2
+import numpy as np
+
+# Crops smaller than this in either direction fall back to the full frame.
+MIN_CROP_PIXELS = 16
+
+
+class RoiTracker:
+    def __init__(self, inference_width=None, track=True, padding=0.25, min_size=0.3):
+        self.inference_width = inference_width
+        self.track = track
+        self.padding = padding
+        self.min_size = min_size
+        self.box = None
+        self.region = None
+
+    def reset(self):
+        self.box = None
+
+    def crop(self, frame, buffers=None):
+        height, width = frame.shape[:2]
+        if self.box is not None:
+            x0, y0, x1, y1 = (self.box * (width, height, width, height)).astype(int)
+            if x1 - x0 < MIN_CROP_PIXELS or y1 - y0 < MIN_CROP_PIXELS:
+                self.box = None
+        if self.box is None:
+            x0, y0, x1, y1 = 0, 0, width, height
+        self.region = (x0, y0, x1 - x0, y1 - y0, width, height)
+
+        image = frame[y0:y1, x0:x1]
+        if self.inference_width and x1 - x0 > self.inference_width:
+            scaled_height = round((y1 - y0) * self.inference_width / (x1 - x0))
+            resized = None
+            if buffers is not None:
+                resized = buffers.get(
+                    "resized", (scaled_height, self.inference_width) + image.shape[2:]
+                )
+            image = cv2.resize(
+                image,
+                (self.inference_width, scaled_height),
+                dst=resized,
+                interpolation=cv2.INTER_AREA,
+            )
+        return image
+
+    def update(self, pose_frame, min_visibility=0.5):
+        if not pose_frame.detected:
+            self.box = None
+            return
+
+        x0, y0, crop_width, crop_height, width, height = self.region
+        points = pose_frame.points
+        points[:, 0] = (x0 + points[:, 0] * crop_width) / width
+        points[:, 1] = (y0 + points[:, 1] * crop_height) / height
+        points[:, 2] *= crop_width / width
+        pose_frame.compute()
+
+        if not self.track:
+            return
+        visible = points[points[:, 3] >= min_visibility, :2]
+        if len(visible) < 4:
+            self.box = None
+            return
+
+        low = visible.min(axis=0)
+        high = visible.max(axis=0)
+        # Landmarks can lie past the frame edge, as when someone walks out of
+        # view, so the box is kept centered inside the frame.
+        center = np.clip((low + high) / 2, 0.0, 1.0)
+        half = np.maximum((high - low) * (0.5 + self.padding), self.min_size / 2)
+        self.box = np.clip(np.concatenate([center - half, center + half]), 0.0, 1.0)
+
+
+def add_region_arguments(parser):
+    parser.add_argument(
+        "--inference-width",
+        type=int,
+        metavar="PX",
+        help="downscale frames to this width before pose inference",
+    )
+    parser.add_argument(
+        "--roi",
+        action="store_true",
+        help="crop inference to the area around the previous frame's pose",
+    )
+
+
+def region_from_args(args):
+    if not args.inference_width and not args.roi:
+        return None
+    return RoiTracker(args.inference_width, track=args.roi)
@@ -0,0 +1,378 @@
+import argparse
+import functools
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+from buffers import FrameBuffers, FramePool
+from counters import COUNTERS
+from engine import (
+    add_pose_arguments,
+    infer,
+    pose_from_args,
+    update_counter,
+    video_clock,
+)
+from landmarks import PoseFrame
+from pipeline import LatestQueue, StageStats
+from reps import RepEvents, RepMetrics
+
+
+class Stream:
+    def __init__(self, stream_id, exercise, source=None, target=None, queue_size=2):
+        self.id = stream_id
+        self.exercise = exercise
+        self.source = source
+        self.target = target
+        self.events = RepEvents()
+        self.metrics = RepMetrics()
+        self.events.subscribe(self.metrics.update)
+        self.counter = COUNTERS[exercise](self.events)
+        self.pool = FramePool(queue_size + 2)
+        self.frames = LatestQueue(
+            queue_size, on_drop=lambda item: self.pool.release(item[1])
+        )
+        self.pose = None
+        self.pose_frame = PoseFrame()
+        self.stats = StageStats("inference")
+        self.status = "waiting"
+        self.error = None
+        self.closed = False
+        self.scheduled = False
+        self.reader = None
+        self.stop = threading.Event()
+        # Recorded clips are read no faster than they are scored, so no frame is
+        # dropped; cameras and pushed frames always keep only the newest ones.
+        self.space = threading.Semaphore(queue_size) if _is_file(source) else None
+
+    def done(self):
+        return self.target is not None and self.counter.count >= self.target
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "exercise": self.exercise,
+            "source": self.source,
+            "status": self.status,
+            "count": self.counter.count,
+            "target": self.target,
+            "reps": self.metrics.summary(),
+            "frames": self.stats.frames,
+            "fps": round(self.stats.fps(), 1),
+            "dropped": self.frames.dropped,
+            "error": self.error,
+        }
+
+
+def _is_file(source):
+    return isinstance(source, str) and os.path.isfile(source)
+
+
+def _open_source(source):
+    return cv2.VideoCapture(int(source) if source.isdigit() else source)
+
+
+class StreamServer:
+    def __init__(self, open_model, workers=None):
+        self.open_model = open_model
+        self.workers = workers or os.cpu_count()
+        self.streams = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._ready = queue.Queue()
+        self._threads = [
+            threading.Thread(target=self._work, daemon=True)
+            for _ in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def add(self, exercise, source=None, stream_id=None, target=None):
+        if exercise not in COUNTERS:
+            raise ValueError(f"unknown exercise {exercise!r}")
+        if isinstance(source, int) and not isinstance(source, bool):
+            # A camera index, as JSON clients tend to send it.
+            source = str(source)
+        if source is not None and not isinstance(source, str):
+            raise ValueError(f"source must be a camera index, file or URL: {source!r}")
+        if target is not None and (
+            not isinstance(target, int) or isinstance(target, bool) or target < 1
+        ):
+            raise ValueError(f"target must be a positive number of reps: {target!r}")
+        with self._lock:
+            stream_id = str(stream_id or next(self._ids))
+            if stream_id in self.streams:
+                raise ValueError(f"stream {stream_id!r} already exists")
+            stream = Stream(stream_id, exercise, source, target)
+            self.streams[stream_id] = stream
+
+        if source is not None:
+            stream.reader = threading.Thread(
+                target=self._read, args=(stream,), daemon=True
+            )
+            stream.reader.start()
+        return stream
+
+    def push(self, stream, frame, timestamp=None):
+        if stream.space is not None:
+            stream.space.acquire()
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        stream.frames.put((timestamp, frame))
+        with self._lock:
+            if stream.status == "waiting":
+                stream.status = "running"
+            if not stream.scheduled:
+                stream.scheduled = True
+                self._ready.put(stream)
+
+    def finish(self, stream):
+        # The last worker to see the stream drained releases its model.
+        with self._lock:
+            stream.closed = True
+            if not stream.scheduled:
+                stream.scheduled = True
+                self._ready.put(stream)
+
+    def remove(self, stream_id):
+        with self._lock:
+            stream = self.streams.pop(stream_id)
+        stream.stop.set()
+        if stream.space is not None:
+            stream.space.release()
+        self.finish(stream)
+        return stream
+
+    def _read(self, stream):
+        cap = None
+        try:
+            cap = _open_source(stream.source)
+            if not cap.isOpened():
+                stream.error = f"could not open {stream.source}"
+                return
+            clock = video_clock(cap) if stream.space is not None else time.perf_counter
+            while not stream.stop.is_set() and not stream.done():
+                ret, frame = stream.pool.read(cap)
+                if not ret:
+                    break
+                self.push(stream, frame, clock())
+        except Exception as e:
+            stream.error = str(e)
+        finally:
+            if cap is not None:
+                cap.release()
+            self.finish(stream)
+
+    def _work(self):
+        buffers = FrameBuffers()
+        while True:
+            stream = self._ready.get()
+            if stream is None:
+                return
+
+            try:
+                item = stream.frames.get(timeout=0)
+            except queue.Empty:
+                item = None
+            if stream.space is not None and item is not None:
+                stream.space.release()
+
+            if item is not None and not stream.done() and stream.error is None:
+                timestamp, frame = item
+                try:
+                    started = time.perf_counter()
+                    if stream.pose is None:
+                        stream.pose = self.open_model()
+                    infer(
+                        stream.pose,
+                        frame,
+                        stream.pose_frame,
+                        timestamp=timestamp,
+                        buffers=buffers,
+                    )
+                    update_counter(stream.counter, stream.pose_frame, verbose=False)
+                    stream.stats.record(started)
+                except Exception as e:
+                    stream.error = str(e)
+                if stream.source is not None:
+                    stream.pool.release(frame)
+
+            with self._lock:
+                if len(stream.frames) and not stream.done() and stream.error is None:
+                    self._ready.put(stream)
+                    continue
+                stream.scheduled = False
+                if stream.closed or stream.done() or stream.error is not None:
+                    self._close(stream)
+
+    def _close(self, stream):
+        if stream.status in ("finished", "failed"):
+            return
+        stream.stop.set()
+        if stream.space is not None:
+            stream.space.release()
+        stream.status = "failed" if stream.error is not None else "finished"
+        stream.counter.finish()
+        stream.events.close()
+        if stream.pose is not None:
+            stream.pose.close()
+            stream.pose = None
+
+    def summary(self):
+        with self._lock:
+            streams = list(self.streams.values())
+        return {
+            "workers": self.workers,
+            "streams": [stream.summary() for stream in streams],
+        }
+
+    def close(self):
+        with self._lock:
+            streams = list(self.streams.values())
+        for stream in streams:
+            stream.stop.set()
+            if stream.space is not None:
+                stream.space.release()
+        for stream in streams:
+            if stream.reader is not None:
+                stream.reader.join()
+            else:
+                self.finish(stream)
+        for _ in self._threads:
+            self._ready.put(None)
+        for thread in self._threads:
+            thread.join()
+        for stream in streams:
+            stream.events.close()
+            if stream.pose is not None:
+                stream.pose.close()
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+    streams = None
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _route(self):
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        if not parts or parts[0] != "streams":
+            return None, parts
+        stream = None
+        if len(parts) > 1:
+            stream = self.streams.streams.get(parts[1])
+        return stream, parts
+
+    def do_GET(self):
+        stream, parts = self._route()
+        if parts == ["streams"]:
+            self._reply(200, self.streams.summary())
+        elif stream is not None and len(parts) == 2:
+            self._reply(200, stream.summary())
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        stream, parts = self._route()
+        if parts == ["streams"]:
+            try:
+                options = json.loads(self._body() or b"{}")
+                if not isinstance(options, dict):
+                    raise ValueError("body must be a JSON object")
+                stream = self.streams.add(
+                    options["exercise"],
+                    options.get("source"),
+                    options.get("id"),
+                    options.get("target"),
+                )
+            except (KeyError, ValueError) as e:
+                self._reply(400, {"error": str(e)})
+                return
+            self._reply(201, stream.summary())
+        elif stream is not None and parts[2:] == ["frames"]:
+            if stream.source is not None or stream.stop.is_set():
+                self._reply(409, {"error": "stream does not accept frames"})
+                return
+            data = np.frombuffer(self._body(), dtype=np.uint8)
+            frame = cv2.imdecode(data, cv2.IMREAD_COLOR) if data.size else None
+            if frame is None:
+                self._reply(400, {"error": "body is not an encoded image"})
+                return
+            self.streams.push(stream, frame)
+            self._reply(202, stream.summary())
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_DELETE(self):
+        stream, parts = self._route()
+        if stream is not None and len(parts) == 2:
+            self._reply(200, self.streams.remove(stream.id).summary())
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Count reps for many video streams at once and report them over HTTP."
+    )
+    parser.add_argument(
+        "sources",
+        nargs="*",
+        metavar="EXERCISE=SOURCE",
+        help="streams to start with, e.g. squats=clip.mp4 or pushups=rtsp://host/feed",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="inference threads shared by all streams",
+    )
+    add_pose_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    streams = StreamServer(functools.partial(pose_from_args, args), args.workers)
+    for spec in args.sources:
+        exercise, _, source = spec.partition("=")
+        stream = streams.add(exercise, source)
+        print(f"Stream {stream.id}: {exercise} from {source}")
+
+    handler = type("Handler", (StreamHandler,), {"streams": streams})
+    httpd = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"Serving stream counts on http://{args.host}:{httpd.server_port}/streams")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        streams.close()
+        for stream in streams.summary()["streams"]:
+            print(f"Stream {stream['id']} ({stream['exercise']}): {stream['count']} reps")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from engine import infer, open_pose
+from landmarks import PoseFrame
+
+
+class Session:
+    def __init__(self, camera=0, open_model=open_pose):
+        self.camera = camera
+        self.open_model = open_model
+        self.cap = None
+        self.pose = None
+        self.timings = {}
+        self._error = None
+        self._ready = threading.Event()
+        self._thread = None
+        self._started = None
+        self._preparing = None
+        self._stop_preparing = threading.Event()
+
+    def warm_up(self):
+        if self._thread is None:
+            self._started = time.perf_counter()
+            self._thread = threading.Thread(target=self._open, daemon=True)
+            self._thread.start()
+
+    def _open(self):
+        try:
+            started = time.perf_counter()
+            self.cap = cv2.VideoCapture(self.camera)
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            self.timings["camera_open"] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            self.pose = self.open_model()
+            self.timings["model_load"] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            if isinstance(self.camera, int):
+                ret, frame = self.cap.read()
+            else:
+                # Reading from a video file would skip its first frame, so the
+                # model warms up on a blank one of the same size instead.
+                width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                ret = width > 0 and height > 0
+                frame = np.zeros((height, width, 3), dtype=np.uint8)
+            if ret:
+                infer(self.pose, frame, PoseFrame())
+                self.timings["warm_up_inference"] = time.perf_counter() - started
+        except Exception as e:
+            self._error = e
+        finally:
+            self.timings["ready"] = time.perf_counter() - self._started
+            self._ready.set()
+
+    def prepare(self, interval=0.5):
+        # Keeps a live camera's buffer fresh and the model warm while nothing
+        # else uses them, e.g. during a break. Files are left alone so that no
+        # frames are skipped.
+        if not isinstance(self.camera, int) or self._preparing is not None:
+            return
+        self._stop_preparing.clear()
+        self._preparing = threading.Thread(
+            target=self._prepare, args=(interval,), daemon=True
+        )
+        self._preparing.start()
+
+    def _prepare(self, interval):
+        self._ready.wait()
+        if self._error is not None:
+            return
+        pose_frame = PoseFrame()
+        warmed_at = time.perf_counter()
+        while not self._stop_preparing.is_set() and self.cap.isOpened():
+            if not self.cap.grab():
+                break
+            if time.perf_counter() - warmed_at >= interval:
+                ret, frame = self.cap.retrieve()
+                if ret:
+                    infer(self.pose, frame, pose_frame)
+                warmed_at = time.perf_counter()
+
+    def _finish_preparing(self):
+        if self._preparing is not None:
+            self._stop_preparing.set()
+            self._preparing.join()
+            self._preparing = None
+
+    def acquire(self):
+        self.warm_up()
+        waited = time.perf_counter()
+        self._ready.wait()
+        self.timings.setdefault("first_wait", time.perf_counter() - waited)
+        if self._error is not None:
+            raise self._error
+        self._finish_preparing()
+        return self.cap, self.pose
+
+    def summary(self):
+        return ", ".join(
+            f"{name.replace('_', ' ')} {seconds * 1000:.0f} ms"
+            for name, seconds in self.timings.items()
+        )
+
+    def close(self):
+        if self._thread is not None:
+            self._ready.wait()
+        self._finish_preparing()
+        if self.cap is not None:
+            self.cap.release()
+        if self.pose is not None:
+            self.pose.close()
+
+    def __enter__(self):
+        self.warm_up()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,106 @@
+import numpy as np
+
+from landmarks import LANDMARK_INDEX, NUM_LANDMARKS
+
+
+STANDING = {
+    "NOSE": (0.50, 0.20),
+    "LEFT_EAR": (0.46, 0.20),
+    "RIGHT_EAR": (0.54, 0.20),
+    "LEFT_SHOULDER": (0.42, 0.30),
+    "RIGHT_SHOULDER": (0.58, 0.30),
+    "LEFT_ELBOW": (0.40, 0.42),
+    "RIGHT_ELBOW": (0.60, 0.42),
+    "LEFT_WRIST": (0.40, 0.54),
+    "RIGHT_WRIST": (0.60, 0.54),
+    "LEFT_INDEX": (0.40, 0.57),
+    "RIGHT_INDEX": (0.60, 0.57),
+    "LEFT_HIP": (0.45, 0.55),
+    "RIGHT_HIP": (0.55, 0.55),
+    "LEFT_KNEE": (0.45, 0.70),
+    "RIGHT_KNEE": (0.55, 0.70),
+    "LEFT_ANKLE": (0.45, 0.85),
+    "RIGHT_ANKLE": (0.55, 0.85),
+}
+
+
+def standing_pose():
+    points = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+    points[:, 3] = 1.0
+    points[:, :2] = STANDING["NOSE"]
+    for name, xy in STANDING.items():
+        points[LANDMARK_INDEX[name], :2] = xy
+    return points
+
+
+def _bend(points, first, vertex, last, degrees):
+    # Rotate the vertex->last segment so the first-vertex-last angle equals degrees.
+    a, b, c = (LANDMARK_INDEX[name] for name in (first, vertex, last))
+    towards_first = points[a, :2] - points[b, :2]
+    heading = np.arctan2(towards_first[1], towards_first[0]) + np.radians(degrees)
+    length = np.linalg.norm(points[c, :2] - points[b, :2])
+    points[c, :2] = points[b, :2] + length * np.array([np.cos(heading), np.sin(heading)])
+
+
+def squat(depth, rep=0):
+    points = standing_pose()
+    _bend(points, "LEFT_HIP", "LEFT_KNEE", "LEFT_ANKLE", 180 - 80 * depth)
+    _bend(points, "RIGHT_HIP", "RIGHT_KNEE", "RIGHT_ANKLE", 180 + 80 * depth)
+    return points
+
+
+def pushup(depth, rep=0):
+    points = standing_pose()
+    _bend(points, "LEFT_SHOULDER", "LEFT_ELBOW", "LEFT_WRIST", 175 - 105 * depth)
+    _bend(points, "RIGHT_SHOULDER", "RIGHT_ELBOW", "RIGHT_WRIST", 185 + 105 * depth)
+    return points
+
+
+def head_rotation(depth, rep=0):
+    points = standing_pose()
+    # Turning the head swings the far ear round behind the nose.
+    points[LANDMARK_INDEX["RIGHT_EAR"], :2] = (0.54 - 0.07 * depth, 0.20 - 0.02 * depth)
+    return points
+
+
+def jumping_jack(depth, rep=0):
+    points = standing_pose()
+    lift = 0.45 * depth
+    for side in ("LEFT", "RIGHT"):
+        for joint in ("WRIST", "INDEX"):
+            points[LANDMARK_INDEX[f"{side}_{joint}"], 1] -= lift
+    return points
+
+
+def toe_touch(depth, rep=0):
+    points = standing_pose()
+    if rep % 2 == 0:
+        hand, foot = "LEFT_INDEX", "RIGHT_ANKLE"
+    else:
+        hand, foot = "RIGHT_INDEX", "LEFT_ANKLE"
+    start = points[LANDMARK_INDEX[hand], :2].copy()
+    target = points[LANDMARK_INDEX[foot], :2]
+    points[LANDMARK_INDEX[hand], :2] = start + (target - start) * depth
+    return points
+
+
+POSES = {
+    "squats": squat,
+    "pushups": pushup,
+    "head_rotation": head_rotation,
+    "jumping jacks": jumping_jack,
+    "alternate_toe_touches": toe_touch,
+}
+
+
+def rep_sequence(exercise, reps=10, frames_per_rep=30, noise=0.002, seed=0):
+    rng = np.random.default_rng(seed)
+    phase = np.linspace(0.0, 1.0, frames_per_rep, endpoint=False)
+    depths = np.sin(np.pi * phase) ** 2
+    pose = POSES[exercise]
+    frames = [pose(depth, rep) for rep in range(reps) for depth in depths]
+    frames.extend([pose(0.0)] * frames_per_rep)
+
+    points = np.stack(frames)
+    points[:, :, :2] += rng.normal(0.0, noise, points[:, :, :2].shape)
+    return points
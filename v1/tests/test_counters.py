@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from counters import COUNTERS
+from landmarks import iter_pose_frames
+from reps import RepEvents
+from synthetic import rep_sequence
+from traces import replay
+
+EXERCISES = sorted(COUNTERS)
+
+
+@pytest.mark.parametrize("exercise", EXERCISES)
+def test_replay_counts_every_rep(exercise):
+    points = rep_sequence(exercise, reps=10)
+    assert replay(points, COUNTERS[exercise]()) == 10
+
+
+@pytest.mark.parametrize("exercise", EXERCISES)
+def test_replay_stops_at_target(exercise):
+    points = rep_sequence(exercise, reps=10)
+    assert replay(points, COUNTERS[exercise](), target=4) == 4
+
+
+@pytest.mark.parametrize("exercise", EXERCISES)
+def test_replay_matches_frame_by_frame_updates(exercise):
+    points = rep_sequence(exercise, reps=10, noise=0.01, seed=1)
+    counter = COUNTERS[exercise]()
+    for pose_frame in iter_pose_frames(points):
+        counter.update(pose_frame)
+    assert replay(points, COUNTERS[exercise]()) == counter.count
+
+
+@pytest.mark.parametrize("exercise", EXERCISES)
+def test_frames_without_a_person_are_skipped(exercise):
+    points = rep_sequence(exercise, reps=10)
+    points[::7] = np.nan
+    assert replay(points, COUNTERS[exercise]()) == 10
+
+
+@pytest.mark.parametrize("exercise", EXERCISES)
+def test_every_rep_is_published(exercise):
+    points = rep_sequence(exercise, reps=10)
+    with RepEvents() as events:
+        published = events.subscribe(maxsize=None)
+        replay(points, COUNTERS[exercise](events))
+        reps = published.drain()
+
+    assert sorted(rep.number for rep in reps) == list(range(1, 11))
+    for rep in reps:
+        assert rep.exercise == exercise
+        assert 0 < rep.duration == pytest.approx(rep.end - rep.start)
+        assert rep.low < rep.high
+        assert rep.range == pytest.approx(rep.high - rep.low)
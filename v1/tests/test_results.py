@@ -0,0 +1,87 @@
+import time
+
+from results import Journal, MemoryBackend, ResultWriter
+
+
+class FlakyBackend(MemoryBackend):
+    # Fails its first `failures` writes.
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+        self.attempts = 0
+
+    def write(self, records):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise ConnectionError("backend unavailable")
+        super().write(records)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_writes_submitted_records(tmp_path):
+    journal = tmp_path / "pending.jsonl"
+    backend = MemoryBackend()
+    with ResultWriter(backend, str(journal), flush_interval=0.01) as writer:
+        squats = writer.submit("user", "squats", 10, reps=[1.23456, 2.5])
+        pushups = writer.submit("user", "pushups", 5)
+
+    assert backend.records == [squats, pushups]
+    assert squats["reps"] == [1.235, 2.5]
+    assert journal.read_text() == ""
+
+
+def test_retries_failed_writes(tmp_path, capsys):
+    journal = tmp_path / "pending.jsonl"
+    backend = FlakyBackend(failures=2)
+    with ResultWriter(
+        backend, str(journal), flush_interval=0.01, initial_backoff=0.01
+    ) as writer:
+        record = writer.submit("user", "squats", 10)
+        wait_for(lambda: backend.records)
+
+    assert backend.attempts == 3
+    assert backend.records == [record]
+    assert capsys.readouterr().out.count("retrying") == 2
+    assert journal.read_text() == ""
+
+
+def test_replays_journal_after_restart(tmp_path):
+    journal = str(tmp_path / "pending.jsonl")
+    down = FlakyBackend(failures=float("inf"))
+    writer = ResultWriter(down, journal, flush_interval=0.01, initial_backoff=0.01)
+    records = [writer.submit("user", "squats", count) for count in (8, 10)]
+    wait_for(lambda: down.attempts)
+    writer.close()
+    assert down.records == []
+
+    backend = MemoryBackend()
+    with ResultWriter(backend, journal, flush_interval=0.01):
+        pass
+    assert sorted(backend.records, key=lambda r: r["count"]) == records
+
+    # Everything was acknowledged, so the next session has nothing to resend.
+    reopened = Journal(journal)
+    assert reopened.pending == {}
+    reopened.close()
+
+
+def test_journal_keeps_unacknowledged_records(tmp_path):
+    path = tmp_path / "pending.jsonl"
+    journal = Journal(str(path))
+    for record_id in ("a", "b", "c"):
+        journal.append({"id": record_id})
+    journal.ack(["a", "c"])
+    journal.close()
+    # A line cut short by a crash is skipped.
+    with open(path, "a") as f:
+        f.write('{"id": "d", "us')
+
+    reopened = Journal(str(path))
+    assert list(reopened.pending) == ["b"]
+    reopened.close()
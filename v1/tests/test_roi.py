@@ -0,0 +1,43 @@
+import cv2
+import numpy as np
+import pytest
+
+from landmarks import PoseFrame
+from roi import RoiTracker
+
+
+def pose_at(x, y):
+    pose_frame = PoseFrame()
+    pose_frame.points[:, 0] = x
+    pose_frame.points[:, 1] = y
+    pose_frame.points[:, 3] = 1.0
+    pose_frame.detected = True
+    return pose_frame
+
+
+@pytest.mark.parametrize(
+    "x, y",
+    [
+        (np.linspace(1.15, 1.3, 33), 0.5),
+        (np.linspace(-0.4, -0.1, 33), 0.5),
+        (0.5, np.linspace(1.1, 1.2, 33)),
+    ],
+)
+def test_landmarks_past_the_frame_edge_keep_a_usable_crop(x, y):
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    tracker = RoiTracker()
+    tracker.crop(frame)
+    tracker.update(pose_at(x, y))
+
+    image = tracker.crop(frame)
+    assert image.shape[0] > 0 and image.shape[1] > 0
+    cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def test_tiny_box_falls_back_to_the_full_frame():
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    tracker = RoiTracker()
+    tracker.box = np.array([0.5, 0.2, 0.505, 0.8])
+
+    assert tracker.crop(frame).shape == frame.shape
+    assert tracker.box is None
@@ -0,0 +1,178 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import cv2
+import numpy as np
+import pytest
+
+import server
+from backends import PoseResult
+from server import StreamHandler, StreamServer
+from synthetic import rep_sequence
+
+REPS = 3
+
+
+class ScriptedPose:
+    # Stands in for the pose model: returns the landmarks of one synthetic rep
+    # sequence, one frame per call.
+    def __init__(self, points):
+        self.points = points
+        self.calls = 0
+        self.closed = False
+
+    def process(self, image):
+        points = self.points[min(self.calls, len(self.points) - 1)]
+        self.calls += 1
+        return PoseResult(points)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def clip(tmp_path):
+    # A 30 fps clip with one frame per synthetic landmark frame.
+    path = str(tmp_path / "squats.avi")
+    frames = len(rep_sequence("squats", reps=REPS))
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30.0, (64, 48))
+    assert writer.isOpened()
+    for index in range(frames):
+        writer.write(np.full((48, 64, 3), index % 256, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+@pytest.fixture
+def streams():
+    points = rep_sequence("squats", reps=REPS)
+    streams = StreamServer(lambda: ScriptedPose(points), workers=2)
+    yield streams
+    streams.close()
+
+
+def wait_until_done(stream, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while stream.status not in ("finished", "failed"):
+        assert time.monotonic() < deadline, f"stream still {stream.status}"
+        time.sleep(0.01)
+    return stream.summary()
+
+
+def test_file_stream_counts_every_frame(streams, clip):
+    summary = wait_until_done(streams.add("squats", clip))
+    assert summary["status"] == "finished"
+    assert summary["count"] == REPS
+    assert summary["reps"]["reps"] == REPS
+    assert summary["frames"] == len(rep_sequence("squats", reps=REPS))
+    assert summary["dropped"] == 0
+    assert summary["error"] is None
+
+
+def test_target_stops_stream_early(streams, clip):
+    summary = wait_until_done(streams.add("squats", clip, target=2))
+    assert summary["status"] == "finished"
+    assert summary["count"] == 2
+    assert summary["frames"] < len(rep_sequence("squats", reps=REPS))
+
+
+def test_unopenable_source_fails(streams, tmp_path):
+    summary = wait_until_done(streams.add("squats", str(tmp_path / "missing.mp4")))
+    assert summary["status"] == "failed"
+    assert "could not open" in summary["error"]
+
+
+def test_camera_index_fails_when_camera_cannot_open(streams, monkeypatch):
+    opened = []
+
+    class NoCamera:
+        def __init__(self, source):
+            opened.append(source)
+
+        def isOpened(self):
+            return False
+
+        def release(self):
+            pass
+
+    monkeypatch.setattr(server.cv2, "VideoCapture", NoCamera)
+    summary = wait_until_done(streams.add("squats", 0))
+    assert opened == [0]
+    assert summary["source"] == "0"
+    assert summary["status"] == "failed"
+
+
+@pytest.fixture
+def http(streams):
+    handler = type("Handler", (StreamHandler,), {"streams": streams})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(
+        target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def request(url, method="GET", body=None):
+    data = None if body is None else json.dumps(body).encode()
+    try:
+        with urllib.request.urlopen(
+            urllib.request.Request(url, data=data, method=method)
+        ) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_http_streams(http, streams, clip):
+    status, created = request(
+        f"{http}/streams", "POST", {"exercise": "squats", "source": clip, "id": "a"}
+    )
+    assert status == 201
+    assert created["id"] == "a"
+    wait_until_done(streams.streams["a"])
+
+    status, listing = request(f"{http}/streams")
+    assert status == 200
+    assert [stream["id"] for stream in listing["streams"]] == ["a"]
+    status, stream = request(f"{http}/streams/a")
+    assert (status, stream["count"], stream["status"]) == (200, REPS, "finished")
+
+    status, removed = request(f"{http}/streams/a", "DELETE")
+    assert (status, removed["id"]) == (200, "a")
+    assert request(f"{http}/streams/a")[0] == 404
+    assert request(f"{http}/streams/a", "DELETE")[0] == 404
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"source": "clip.mp4"},
+        {"exercise": "planks"},
+        {"exercise": "squats", "source": [0]},
+        {"exercise": "squats", "target": "10"},
+        ["squats"],
+    ],
+)
+def test_http_rejects_bad_streams(http, body):
+    status, reply = request(f"{http}/streams", "POST", body)
+    assert status == 400
+    assert "error" in reply
+
+
+def test_http_pushed_frames(http, streams):
+    status, created = request(f"{http}/streams", "POST", {"exercise": "squats"})
+    assert status == 201
+    _, image = cv2.imencode(".png", np.zeros((48, 64, 3), dtype=np.uint8))
+    pushed = urllib.request.Request(
+        f"{http}/streams/{created['id']}/frames", data=image.tobytes(), method="POST"
+    )
+    with urllib.request.urlopen(pushed) as response:
+        assert response.status == 202
+    assert request(f"{http}/streams/{created['id']}/frames", "POST", {})[0] == 400
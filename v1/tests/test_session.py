@@ -0,0 +1,38 @@
+import cv2
+import numpy as np
+
+from backends import PoseResult
+from session import Session
+
+
+class BlankPose:
+    def __init__(self):
+        self.images = []
+
+    def process(self, image):
+        self.images.append(image.copy())
+        return PoseResult(None)
+
+    def close(self):
+        pass
+
+
+def test_video_file_keeps_its_first_frame(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30.0, (64, 48))
+    for value in (200, 100, 50):
+        writer.write(np.full((48, 64, 3), value, dtype=np.uint8))
+    writer.release()
+
+    pose = BlankPose()
+    with Session(path, open_model=lambda: pose) as session:
+        cap, _ = session.acquire()
+        assert "warm_up_inference" in session.timings
+        ret, frame = cap.read()
+
+    assert ret
+    assert abs(int(frame.mean()) - 200) < 5
+    # The model was warmed up on a blank frame of the clip's size.
+    assert len(pose.images) == 1
+    assert pose.images[0].shape == (48, 64, 3)
+    assert not pose.images[0].any()
@@ -0,0 +1,73 @@
+from workouts import WorkoutStore, import_jsonl
+
+
+def record(record_id, exercise, count, timestamp, reps=()):
+    return {
+        "id": record_id,
+        "user_id": "user",
+        "exercise": exercise,
+        "count": count,
+        "timestamp": timestamp,
+        "reps": list(reps),
+    }
+
+
+def test_retried_records_are_stored_once(tmp_path):
+    first = record("a", "squats", 10, "2024-03-06T09:00:00", reps=[1.5, 3.0])
+    with WorkoutStore(str(tmp_path / "workouts.db")) as store:
+        store.write([first])
+        store.write([first, record("b", "squats", 5, "2024-03-06T18:00:00")])
+
+        assert [row[0] for row in store.sets("user")] == ["a", "b"]
+        assert store.reps("a") == [1.5, 3.0]
+        assert store.totals("user", "day") == [("2024-03-06", "squats", 2, 15)]
+
+
+def test_rollups_per_period(tmp_path):
+    with WorkoutStore(str(tmp_path / "workouts.db")) as store:
+        store.write(
+            [
+                record("a", "squats", 10, "2024-03-04T09:00:00"),
+                record("b", "squats", 12, "2024-03-06T09:00:00"),
+                record("c", "pushups", 8, "2024-03-06T10:00:00"),
+                record("d", "squats", 6, "2024-04-01T09:00:00"),
+            ]
+        )
+
+        assert store.totals("user", "day") == [
+            ("2024-03-04", "squats", 1, 10),
+            ("2024-03-06", "pushups", 1, 8),
+            ("2024-03-06", "squats", 1, 12),
+            ("2024-04-01", "squats", 1, 6),
+        ]
+        # Weeks start on Monday.
+        assert store.totals("user", "week") == [
+            ("2024-03-04", "pushups", 1, 8),
+            ("2024-03-04", "squats", 2, 22),
+            ("2024-04-01", "squats", 1, 6),
+        ]
+        assert store.totals("user", "month") == [
+            ("2024-03-01", "pushups", 1, 8),
+            ("2024-03-01", "squats", 2, 22),
+            ("2024-04-01", "squats", 1, 6),
+        ]
+        assert store.totals("user", "day", since="2024-03-05", until="2024-03-31") == [
+            ("2024-03-06", "pushups", 1, 8),
+            ("2024-03-06", "squats", 1, 12),
+        ]
+        assert store.totals("user", "month", exercise="pushups") == [
+            ("2024-03-01", "pushups", 1, 8)
+        ]
+        assert store.totals("someone else", "day") == []
+
+
+def test_import_jsonl_skips_known_sets(tmp_path):
+    path = tmp_path / "results.jsonl"
+    path.write_text(
+        '{"id": "a", "user_id": "user", "exercise": "squats", "count": 10, '
+        '"timestamp": "2024-03-06T09:00:00", "reps": []}\n'
+    )
+    with WorkoutStore(str(tmp_path / "workouts.db")) as store:
+        import_jsonl(store, str(path))
+        import_jsonl(store, str(path))
+        assert store.totals("user", "week") == [("2024-03-04", "squats", 1, 10)]
@@ -0,0 +1,106 @@
+import argparse
+import time
+
+import numpy as np
+
+from counters import COUNTERS
+from landmarks import NUM_LANDMARKS
+
+
+class TraceRecorder:
+    def __init__(self, exercise=None, capacity=1024):
+        self.exercise = exercise
+        self.points = np.full((capacity, NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.frames = 0
+        self.started = None
+
+    def _grow(self):
+        capacity = len(self.timestamps) * 2
+        points = np.full((capacity, NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+        points[: self.frames] = self.points[: self.frames]
+        timestamps = np.zeros(capacity, dtype=np.float64)
+        timestamps[: self.frames] = self.timestamps[: self.frames]
+        self.points, self.timestamps = points, timestamps
+
+    def append(self, pose_frame, timestamp=None):
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        if self.started is None:
+            self.started = timestamp
+        if self.frames == len(self.timestamps):
+            self._grow()
+
+        if pose_frame.detected:
+            self.points[self.frames] = pose_frame.points
+        self.timestamps[self.frames] = timestamp - self.started
+        self.frames += 1
+
+    def save(self, path):
+        np.savez(
+            path,
+            points=self.points[: self.frames],
+            timestamps=self.timestamps[: self.frames],
+            exercise=self.exercise or "",
+        )
+
+
+def load_trace(path):
+    with np.load(path) as trace:
+        return trace["points"], trace["timestamps"], str(trace["exercise"])
+
+
+def replay(points, counter, target=None, timestamps=None, fps=30.0):
+    if timestamps is None:
+        timestamps = np.arange(len(points)) / fps
+    # The counter's features for the whole trace in one batched call, so only
+    # its filter and state steps run per frame.
+    program = counter.program
+    detected = ~np.isnan(points[:, 0, 0])
+    signals = program.phase_signals(program.features(points[detected])).tolist()
+    for frame_signals, timestamp in zip(signals, timestamps[detected].tolist()):
+        counter.step(frame_signals, timestamp)
+        if target is not None and counter.count >= target:
+            break
+    counter.finish()
+    return counter.count
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded landmark trace through an exercise counter."
+    )
+    parser.add_argument("trace", help="trace file written by TraceRecorder (.npz)")
+    parser.add_argument(
+        "-e",
+        "--exercise",
+        choices=sorted(COUNTERS),
+        help="counter to replay through (defaults to the recorded exercise)",
+    )
+    parser.add_argument("--repeat", type=int, default=1)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    points, timestamps, recorded_exercise = load_trace(args.trace)
+    exercise = args.exercise or recorded_exercise
+    if exercise not in COUNTERS:
+        print("Trace has no recorded exercise, pass one with --exercise.")
+        return
+
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        count = replay(points, COUNTERS[exercise](), timestamps=timestamps)
+    seconds = (time.perf_counter() - started) / args.repeat
+
+    duration = timestamps[-1] if len(timestamps) else 0.0
+    print(f"{exercise}: {count} reps in {len(points)} frames ({duration:.1f}s recorded)")
+    print(
+        f"Replayed in {seconds * 1000:.2f} ms, "
+        f"{duration / seconds if seconds else 0.0:.0f}x real time"
+    )
+
+
+if __name__ == "__main__":
+    main()
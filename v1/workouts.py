@@ -0,0 +1,197 @@
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+PERIODS = ("day", "week", "month")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sets (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    exercise TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sets_user_time ON sets (user_id, timestamp);
+CREATE INDEX IF NOT EXISTS sets_user_exercise_time
+    ON sets (user_id, exercise, timestamp);
+
+CREATE TABLE IF NOT EXISTS reps (
+    set_id TEXT NOT NULL REFERENCES sets (id),
+    user_id TEXT NOT NULL,
+    exercise TEXT NOT NULL,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reps_user_exercise_time
+    ON reps (user_id, exercise, timestamp);
+CREATE INDEX IF NOT EXISTS reps_set ON reps (set_id);
+
+CREATE TABLE IF NOT EXISTS rollups (
+    user_id TEXT NOT NULL,
+    period TEXT NOT NULL,
+    start TEXT NOT NULL,
+    exercise TEXT NOT NULL,
+    sets INTEGER NOT NULL,
+    reps INTEGER NOT NULL,
+    PRIMARY KEY (user_id, period, start, exercise)
+) WITHOUT ROWID;
+"""
+
+ROLLUP = """
+INSERT INTO rollups (user_id, period, start, exercise, sets, reps)
+VALUES (?, ?, ?, ?, 1, ?)
+ON CONFLICT (user_id, period, start, exercise)
+DO UPDATE SET sets = sets + 1, reps = reps + excluded.reps
+"""
+
+
+def period_start(moment, period):
+    day = moment.date()
+    if period == "week":
+        day -= timedelta(days=day.weekday())
+    elif period == "month":
+        day = day.replace(day=1)
+    return day.isoformat()
+
+
+class WorkoutStore:
+    # Every saved set and its reps in a local SQLite file, plus per-user day,
+    # week and month totals that are updated in the same transaction as each
+    # insert. Totals are read from those rows instead of scanning the history.
+    # Sets are keyed by the result id, so a batch retried by ResultWriter is
+    # only counted once.
+    def __init__(self, path="workouts.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.executescript(SCHEMA)
+
+    def write(self, records):
+        with self._lock, self.db:
+            for record in records:
+                moment = datetime.fromisoformat(record["timestamp"])
+                inserted = self.db.execute(
+                    "INSERT OR IGNORE INTO sets VALUES (?, ?, ?, ?, ?)",
+                    (
+                        record["id"],
+                        record["user_id"],
+                        record["exercise"],
+                        moment.timestamp(),
+                        record["count"],
+                    ),
+                ).rowcount
+                if not inserted:
+                    continue
+                self.db.executemany(
+                    "INSERT INTO reps VALUES (?, ?, ?, ?)",
+                    [
+                        (record["id"], record["user_id"], record["exercise"], rep)
+                        for rep in record.get("reps", ())
+                    ],
+                )
+                self.db.executemany(
+                    ROLLUP,
+                    [
+                        (
+                            record["user_id"],
+                            period,
+                            period_start(moment, period),
+                            record["exercise"],
+                            record["count"],
+                        )
+                        for period in PERIODS
+                    ],
+                )
+
+    def totals(self, user_id, period="day", since=None, until=None, exercise=None):
+        query = "SELECT start, exercise, sets, reps FROM rollups "
+        query += "WHERE user_id = ? AND period = ? AND start >= ? AND start <= ?"
+        params = [user_id, period, since or "", until or "9999"]
+        if exercise is not None:
+            query += " AND exercise = ?"
+            params.append(exercise)
+        query += " ORDER BY start, exercise"
+        with self._lock:
+            return self.db.execute(query, params).fetchall()
+
+    def sets(self, user_id, since=None, until=None, exercise=None):
+        query = "SELECT id, exercise, timestamp, count FROM sets "
+        query += "WHERE user_id = ? AND timestamp >= ? AND timestamp < ?"
+        params = [user_id, since or 0.0, until or float("inf")]
+        if exercise is not None:
+            query += " AND exercise = ?"
+            params.append(exercise)
+        query += " ORDER BY timestamp"
+        with self._lock:
+            return self.db.execute(query, params).fetchall()
+
+    def reps(self, set_id):
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT timestamp FROM reps WHERE set_id = ? ORDER BY timestamp",
+                (set_id,),
+            ).fetchall()
+        return [timestamp for timestamp, in rows]
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def import_jsonl(store, path):
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    store.write([record for record in records if "id" in record])
+    return len(records)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Show workout totals from the local workout store."
+    )
+    parser.add_argument("--store", default="workouts.db", help="SQLite workout store")
+    parser.add_argument("--user", default="Sabareesh M")
+    parser.add_argument("--period", choices=PERIODS, default="week")
+    parser.add_argument("--exercise")
+    parser.add_argument("--since", metavar="YYYY-MM-DD")
+    parser.add_argument("--until", metavar="YYYY-MM-DD")
+    parser.add_argument(
+        "--import",
+        dest="imports",
+        nargs="+",
+        default=[],
+        metavar="JSONL",
+        help="add results saved with --local-results to the store first",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with WorkoutStore(args.store) as store:
+        for path in args.imports:
+            print(f"Imported {import_jsonl(store, path)} results from {path}")
+
+        started = time.perf_counter()
+        rows = store.totals(
+            args.user, args.period, args.since, args.until, args.exercise
+        )
+        seconds = time.perf_counter() - started
+
+    for start, exercise, sets, reps in rows:
+        print(f"{start}  {exercise:<24} {sets:4d} sets  {reps:6d} reps")
+    print(f"{len(rows)} rows in {seconds * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()